@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import functools
+import glob
+import http.server
+import inspect
+import io
+import itertools
+import math
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+
+import bot
+from fake_model import FakeModel
+from fake_telegram import FakeTelegramRequest, make_text_update, make_voice_update
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ANSWER = ("In my last role I owned the order routing service. I started by measuring where the time went, "
+          "moved the slowest lookups behind a cache and cut p95 latency by forty percent.")
+
+stage_timings = defaultdict(list)
+
+def timed(stage, func):
+    # Records how long each call of a bot function takes; works for plain and async functions
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                stage_timings[stage].append(time.perf_counter() - started)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stage_timings[stage].append(time.perf_counter() - started)
+    return wrapper
+
+def instrument_bot():
+    for stage, name in (("fetch", "fetch_job_details"), ("parse", "parse_job_page"),
+                        ("questions", "generate_questions"), ("decode", "decode_voice_to_pcm"),
+                        ("transcribe", "transcribe_audio"), ("feedback", "generate_feedback"),
+                        ("report", "generate_report")):
+        setattr(bot, name, timed(stage, getattr(bot, name)))
+
+def fake_transcription(latency):
+    # Google's recognizer is a network round trip; keep the delay, skip the network
+    def transcribe_audio(audio):
+        time.sleep(latency)
+        return ANSWER
+    return transcribe_audio
+
+def start_job_site(latency):
+    class JobPageHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=os.path.join(FIXTURES_DIR, "jobs"), **kwargs)
+
+        def do_GET(self):
+            time.sleep(latency)
+            super().do_GET()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), JobPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def synthesize_voice_note(seconds, seed, rate=16000):
+    # A warbling tone encoded as OGG/Opus, the format Telegram uses for voice notes
+    import av
+    rng = random.Random(seed)
+    pitch = rng.uniform(120, 260)
+    samples = array('h', (
+        int(6000 * math.sin(2 * math.pi * pitch * (1 + 0.1 * math.sin(n / rate * 3)) * n / rate))
+        for n in range(int(seconds * rate))
+    ))
+    out_buffer = io.BytesIO()
+    with av.open(out_buffer, 'w', format='ogg') as container:
+        stream = container.add_stream('libopus', rate=rate)
+        stream.layout = 'mono'
+        frame_size = rate // 50
+        for start in range(0, len(samples), frame_size):
+            chunk = samples[start:start + frame_size]
+            frame = av.AudioFrame(format='s16', layout='mono', samples=len(chunk))
+            frame.planes[0].update(chunk.tobytes())
+            frame.sample_rate = rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return out_buffer.getvalue()
+
+def load_voice_notes(fixtures, count):
+    clips = sorted(glob.glob(os.path.join(fixtures, "*.ogg")))
+    if clips:
+        notes = []
+        for path in clips:
+            with open(path, "rb") as f:
+                notes.append(f.read())
+        return notes, "recorded"
+    if not bot.pyav_available():
+        return [], "none"
+    return [synthesize_voice_note(15 + 10 * n, seed=n) for n in range(count)], "synthesized"
+
+class Candidate:
+    def __init__(self, user_id, url, app, request, voice_notes, args, rng):
+        self.user_id = user_id
+        self.url = url
+        self.app = app
+        self.request = request
+        self.voice_notes = voice_notes
+        self.args = args
+        self.rng = rng
+
+    async def send(self, stage, payload):
+        update = Update.de_json(payload, self.app.bot)
+        started = time.perf_counter()
+        await self.app.process_update(update)
+        stage_timings[stage].append(time.perf_counter() - started)
+        if self.args.think:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think))
+
+    async def interview(self, update_ids):
+        started = time.perf_counter()
+        await self.send("update:start", make_text_update(next(update_ids), self.user_id, "/start"))
+        await self.send("update:job_url", make_text_update(next(update_ids), self.user_id, self.url))
+        for number in range(bot.QUESTION_COUNT):
+            stage = "update:last_answer" if number == bot.QUESTION_COUNT - 1 else "update:answer"
+            if self.voice_notes and self.rng.random() < self.args.voice_share:
+                note = self.rng.choice(self.voice_notes)
+                file_id = f"voice{self.user_id}x{number}"
+                self.request.files[file_id] = note
+                await self.send(stage, make_voice_update(next(update_ids), self.user_id, file_id, 20))
+                del self.request.files[file_id]
+            else:
+                await self.send(stage, make_text_update(next(update_ids), self.user_id, ANSWER))
+        stage_timings["interview"].append(time.perf_counter() - started)
+
+async def run(args, voice_notes, site_url):
+    request = FakeTelegramRequest(latency=args.telegram_latency, record=True)
+    app = bot.build_application(Application.builder().token("123456:E2E-BENCHMARK").updater(None).request(request))
+    errors = []
+
+    async def record_error(update, context):
+        errors.append(context.error)
+
+    app.add_error_handler(record_error)
+    await app.initialize()
+
+    fixtures = sorted(os.path.basename(path) for path in glob.glob(os.path.join(FIXTURES_DIR, "jobs", "*.html")))
+    urls = [f"{site_url}/{fixtures[n % len(fixtures)]}?posting={n}" for n in range(args.postings)]
+    rng = random.Random(args.seed)
+    update_ids = itertools.count(1)
+    candidates = [
+        Candidate(user_id, rng.choice(urls), app, request, voice_notes, args, random.Random(args.seed + user_id))
+        for user_id in range(1, args.candidates + 1)
+    ]
+
+    async def arrive(index, candidate):
+        await asyncio.sleep(args.ramp * index / max(len(candidates), 1))
+        await candidate.interview(update_ids)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(arrive(index, candidate) for index, candidate in enumerate(candidates)))
+    elapsed = time.perf_counter() - started
+    await app.shutdown()
+    await bot.shutdown_services()
+
+    failed = {user_id for user_id, texts in request.sent.items() if any(text.startswith("❌") for text in texts)}
+    reports = request.calls["sendDocument"]
+    return elapsed, errors, failed, reports, request
+
+def percentile(sorted_values, share):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * share))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive simulated candidates through full interviews against local stand-ins")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--postings", type=int, default=20, help="Distinct job URLs the candidates pick from")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which candidates arrive")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean seconds a candidate pauses between messages")
+    parser.add_argument("--voice-share", type=float, default=0.5, help="Share of answers sent as voice notes")
+    parser.add_argument("--voice-fixtures", default=os.path.join(FIXTURES_DIR, "voice"),
+                        help="Directory of recorded .ogg voice notes; tones are synthesized when empty")
+    parser.add_argument("--latency", type=float, default=0.8, help="Fake Gemini latency in seconds")
+    parser.add_argument("--latency-per-kchar", type=float, default=0.2, help="Extra fake Gemini seconds per 1000 prompt characters")
+    parser.add_argument("--stt-latency", type=float, default=0.4, help="Fake speech-to-text latency in seconds")
+    parser.add_argument("--real-stt", action="store_true", help="Transcribe with bot.TRANSCRIPTION_BACKEND instead")
+    parser.add_argument("--site-latency", type=float, default=0.3, help="Job site response time in seconds")
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="Fake Bot API latency in seconds")
+    parser.add_argument("--llm-rate", type=float, help="Override the scheduler's global Gemini rate (requests/s)")
+    parser.add_argument("--no-pipelining", action="store_true", help="Turn off question prefetching and rubrics")
+    parser.add_argument("--trace-memory", action="store_true", help="Report the tracemalloc peak (slows the run)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    voice_notes, voice_source = load_voice_notes(args.voice_fixtures, 5)
+    bot.gemini_model = FakeModel(latency=args.latency, jitter=args.latency / 4, seed=args.seed,
+                                 latency_per_kchar=args.latency_per_kchar)
+    if args.no_pipelining:
+        bot.PREFETCH_QUESTIONS = bot.PRECOMPUTE_RUBRICS = False
+    if args.llm_rate:
+        bot.llm_scheduler = bot.LLMScheduler(global_rate=args.llm_rate, global_burst=max(1, int(args.llm_rate * 2)))
+    if not args.real_stt:
+        bot.transcribe_audio = fake_transcription(args.stt_latency)
+    instrument_bot()
+    site = start_job_site(args.site_latency)
+    site_url = f"http://127.0.0.1:{site.server_address[1]}"
+
+    if args.trace_memory:
+        tracemalloc.start()
+    elapsed, errors, failed, reports, request = asyncio.run(run(args, voice_notes, site_url))
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+    site.shutdown()
+    bot.shutdown_executors()
+
+    print(f"{args.candidates} candidates, {args.postings} postings, voice notes: {voice_source} "
+          f"({len(voice_notes)}), Gemini {args.latency}s, STT {'real' if args.real_stt else f'{args.stt_latency}s'}")
+    print(f"{'stage':20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage in sorted(stage_timings):
+        values = sorted(stage_timings[stage])
+        print(f"{stage:20} {len(values):6} {percentile(values, 0.5) * 1000:9.1f} {percentile(values, 0.95) * 1000:9.1f} "
+              f"{percentile(values, 0.99) * 1000:9.1f} {values[-1] * 1000:9.1f}")
+    print(f"wall {elapsed:.2f}s, {args.candidates / elapsed * 60:.1f} interviews/min, "
+          f"reports sent {reports}/{args.candidates}, candidates with errors {len(failed)}, unhandled errors {len(errors)}")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB"
+          + (f", tracemalloc peak {traced_peak / 1024 / 1024:.1f} MiB" if traced_peak is not None else ""))
+    print(f"Gemini calls {bot.gemini_model.calls}, Bot API calls {sum(request.calls.values())}")
+    costs, interview_tokens = bot.token_ledger.interview_snapshot()
+    if costs.count:
+        print(f"per interview: {interview_tokens / costs.count:.0f} tokens, ${costs.sum / costs.count:.5f}")
+    for kind, usage in sorted(bot.token_ledger.stats().items()):
+        print(f"  {kind:15} {usage['calls']:5} calls {usage['input_tokens'] / usage['calls']:7.0f} in "
+              f"{usage['output_tokens'] / usage['calls']:5.0f} out tokens/call")
+    print("job cache:", bot.job_cache.stats())
+    print("scheduler:", bot.llm_scheduler.stats())
+    for error in errors[:3]:
+        print("error:", repr(error))
+
+if __name__ == "__main__":
+    main()
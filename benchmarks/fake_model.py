@@ -0,0 +1,84 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from google.api_core import exceptions as google_exceptions
+
+# Stand-in for genai.GenerativeModel: answers the bot's prompts after a configurable delay and
+# rejects calls like the real API when its requests-per-minute quota is exceeded.
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    def __init__(self, latency=0.3, jitter=0.1, rpm=None, seed=None, latency_per_kchar=0.0):
+        self.latency = latency
+        self.latency_per_kchar = latency_per_kchar  # Extra seconds per 1000 prompt characters
+        self.jitter = jitter
+        self.rpm = rpm
+        self.calls = 0
+        self.rejected = 0
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        with self._lock:
+            self.calls += 1
+            if self.rpm is None:
+                return
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.rpm:
+                self.rejected += 1
+                raise google_exceptions.ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+            self._recent.append(now)
+
+    def _delay(self, prompt):
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay + len(prompt) / 1000 * self.latency_per_kchar)
+
+    def reply_for(self, prompt):
+        if '"rubric"' in prompt:
+            items = [int(number) for number in re.findall(r"^\s*Item (\d+):", prompt, re.MULTILINE)]
+            return json.dumps([
+                {"item": item, "rubric": "A concrete example, the candidate's own role in it and a measurable result"}
+                for item in items
+            ])
+        if "JSON array" in prompt:
+            items = [int(number) for number in re.findall(r"^\s*Item (\d+)$", prompt, re.MULTILINE)]
+            return json.dumps([
+                {"item": item, "strength": "Clear structure and a concrete example", "improve": "Quantify the outcome"}
+                for item in items
+            ])
+        if "interview questions" in prompt:
+            return "\n".join(
+                f"{i}. Describe how you would handle challenge number {i} in this role?" for i in range(1, 6)
+            )
+        return "Strength: Clear structure and a concrete example\nImprove: Quantify the outcome of your work"
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self._admit()
+        if stream:
+            return self._stream(prompt)
+        self._delay(prompt)
+        return FakeResponse(self.reply_for(prompt))
+
+    def _stream(self, prompt, chunk_size=24, first_token_share=0.3):
+        # The first chunk arrives after part of the latency; the rest trickle in over the remainder
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        delay += len(prompt) / 1000 * self.latency_per_kchar
+        text = self.reply_for(prompt)
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        time.sleep(delay * first_token_share)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(delay * (1 - first_token_share) / max(len(chunks) - 1, 1))
+            yield FakeResponse(chunk)
@@ -0,0 +1,77 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter, defaultdict
+
+from telegram.request import BaseRequest
+
+# Stand-in for the Telegram Bot API: answers every call the bot makes without touching the
+# network, plus helpers that build the update payloads Telegram would deliver.
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Interview Prep Bot", "username": "interview_prep_bot"}
+
+class FakeTelegramRequest(BaseRequest):
+    def __init__(self, latency=0.0, record=False):
+        self.latency = latency
+        self.calls = Counter()
+        self.files = {}  # file_id -> bytes served for downloads
+        self.sent = defaultdict(list) if record else None  # chat_id -> texts sent to it
+        self._message_ids = itertools.count(1)
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        if "/file/bot" in url:
+            # File downloads return the raw bytes rather than a JSON envelope
+            self.calls["download"] += 1
+            return 200, self.files[endpoint.split(".")[0]]
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = request_data.parameters if request_data else {}
+        if self.sent is not None and "chat_id" in params:
+            self.sent[params["chat_id"]].append(params.get("text") or endpoint)
+        if endpoint == "getMe":
+            result = BOT_USER
+        elif endpoint == "getFile":
+            file_id = params["file_id"]
+            result = {"file_id": file_id, "file_unique_id": file_id,
+                      "file_size": len(self.files[file_id]), "file_path": f"voice/{file_id}.oga"}
+        elif "chat_id" in params:
+            result = make_message(params["chat_id"], next(self._message_ids), params.get("text"))
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+def make_user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"Candidate {user_id}"}
+
+def make_message(chat_id, message_id, text=None, from_user=None):
+    message = {"message_id": message_id, "date": int(time.time()), "chat": {"id": chat_id, "type": "private"}}
+    if from_user is not None:
+        message["from"] = from_user
+    if text is not None:
+        message["text"] = text
+    return message
+
+def make_text_update(update_id, user_id, text):
+    message = make_message(user_id, update_id, text, make_user(user_id))
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+def make_voice_update(update_id, user_id, file_id, duration):
+    message = make_message(user_id, update_id, from_user=make_user(user_id))
+    message["voice"] = {"file_id": file_id, "file_unique_id": file_id, "duration": duration, "mime_type": "audio/ogg"}
+    return {"update_id": update_id, "message": message}
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from fake_model import FakeModel
+
+JOB_DATA = {"title": "Senior Backend Engineer"}
+
+async def run(answers, arrival_rate, seed):
+    # Answers from different users arrive as a Poisson process
+    rng = random.Random(seed)
+    feedback = []
+
+    async def answer(user_id, delay):
+        await asyncio.sleep(delay)
+        feedback.append(await bot.generate_feedback(
+            "Tell me about a time you improved the reliability of a service you owned.",
+            "We added retries with backoff, tightened timeouts and built dashboards for the on-call rotation.",
+            JOB_DATA,
+            user_id
+        ))
+
+    arrivals, at = [], 0.0
+    for _ in range(answers):
+        at += rng.expovariate(arrival_rate)
+        arrivals.append(at)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(answer(user_id, delay) for user_id, delay in enumerate(arrivals)))
+    elapsed = time.perf_counter() - started
+    await bot.llm_scheduler.close()
+    return len(feedback), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Feedback throughput with and without micro-batching")
+    parser.add_argument("--answers", type=int, default=200)
+    parser.add_argument("--arrival-rate", type=float, default=20.0, help="Answers per second arriving")
+    parser.add_argument("--llm-rate", type=float, default=5.0, help="Gemini requests per second allowed")
+    parser.add_argument("--latency", type=float, default=0.8, help="Fake model base latency in seconds")
+    args = parser.parse_args()
+
+    for batching in (False, True):
+        bot.FEEDBACK_BATCHING = batching
+        bot.feedback_batcher = bot.FeedbackBatcher()
+        bot.llm_scheduler = bot.LLMScheduler(global_rate=args.llm_rate, global_burst=int(args.llm_rate), user_rate=10, user_burst=10)
+        bot.gemini_model = FakeModel(latency=args.latency, jitter=0.1, seed=1, latency_per_kchar=0.2)
+        done, elapsed = asyncio.run(run(args.answers, args.arrival_rate, seed=1))
+        calls = bot.gemini_model.calls
+        print(f"batching={'on ' if batching else 'off'} answers={done} wall={elapsed:6.2f}s "
+              f"throughput={done / elapsed:6.2f} answers/s llm calls/answer={calls / done:4.2f}")
+        if batching:
+            print("  batcher:", bot.feedback_batcher.metrics)
+    bot.shutdown_executors()
+
+if __name__ == "__main__":
+    main()
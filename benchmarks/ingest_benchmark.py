@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+
+import bot
+from e2e_benchmark import FIXTURES_DIR, start_job_site
+from fake_model import FakeModel
+from fake_telegram import FakeTelegramRequest, make_text_update
+
+async def time_job_url(urls):
+    # Time from a candidate's job URL to the first question, as handle_job_url sees it
+    app = bot.build_application(Application.builder().token("123456:INGEST").updater(None).request(FakeTelegramRequest()))
+    await app.initialize()
+    timings = []
+    for user_id, url in enumerate(urls, 1):
+        started = time.perf_counter()
+        await app.process_update(Update.de_json(make_text_update(user_id, user_id, url), app.bot))
+        timings.append(time.perf_counter() - started)
+    await app.shutdown()
+    await bot.shutdown_services()
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest postings from a local job site, then time banked vs. live job URLs")
+    parser.add_argument("--postings", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=bot.INGEST_CONCURRENCY)
+    parser.add_argument("--latency", type=float, default=0.8, help="Fake Gemini latency in seconds")
+    parser.add_argument("--site-latency", type=float, default=0.3, help="Job site response time in seconds")
+    parser.add_argument("--llm-rate", type=float, default=20.0, help="Scheduler's global Gemini rate (requests/s)")
+    args = parser.parse_args()
+
+    bot.gemini_model = FakeModel(latency=args.latency, jitter=args.latency / 4, seed=1)
+    site = start_job_site(args.site_latency)
+    fixtures = sorted(os.path.basename(path) for path in glob.glob(os.path.join(FIXTURES_DIR, "jobs", "*.html")))
+    site_url = f"http://127.0.0.1:{site.server_address[1]}"
+    urls = [f"{site_url}/{fixtures[n % len(fixtures)]}?posting={n}" for n in range(args.postings)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bank_path = os.path.join(tmp, "question_bank.db")
+        for label, subset in (("first run, interrupted halfway", urls[:args.postings // 2]), ("resumed run", urls)):
+            bot.llm_scheduler = bot.LLMScheduler(global_rate=args.llm_rate, global_burst=int(args.llm_rate))
+            bank = bot.QuestionBank(bank_path)
+            started = time.perf_counter()
+            progress = asyncio.run(bot.ingest_urls(subset, bank, args.concurrency))
+            elapsed = time.perf_counter() - started
+            print(f"{label}: {progress['ok']} ingested in {elapsed:.1f}s ({progress['ok'] / elapsed * 60:.0f} postings/min)")
+            stats = bank.stats()
+            bank.close()
+        print(f"bank: {stats['postings']} postings, {stats['data_bytes'] / max(stats['postings'], 1):.0f} bytes each compressed, "
+              f"{os.path.getsize(bank_path) / 1024:.0f} KiB on disk")
+
+        live_urls = [f"{url}&live=1" for url in urls[:20]]
+        bot.llm_scheduler = bot.LLMScheduler(global_rate=args.llm_rate, global_burst=int(args.llm_rate))
+        live = asyncio.run(time_job_url(live_urls))
+        bot.QUESTION_BANK_PATH = bank_path
+        bot.llm_scheduler = bot.LLMScheduler(global_rate=args.llm_rate, global_burst=int(args.llm_rate))
+        banked = asyncio.run(time_job_url(urls[:20]))
+        print(f"job URL to first question, p50: live {live * 1000:.0f} ms, banked {banked * 1000:.1f} ms")
+
+    site.shutdown()
+    bot.shutdown_executors()
+
+if __name__ == "__main__":
+    main()
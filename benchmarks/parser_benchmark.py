@@ -0,0 +1,152 @@
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+import bot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jobs")
+
+# The section scan that scrape_job_details used before parse_job_page, kept verbatim for comparison
+def legacy_parse_job_page(page_source, url):
+    soup = BeautifulSoup(page_source, 'html.parser')
+    
+    # Initialize job details
+    job_details = {
+        "title": "",
+        "url": url,
+        "responsibilities": [],
+        "requirements": [],
+        "experience_level": "",
+        "description": ""
+    }
+    
+    # Extract title using multiple methods
+    possible_title_elements = (
+        soup.find('h1') or 
+        soup.find(class_=lambda x: x and ('job-title' in x.lower() or 'jobtitle' in x.lower())) or
+        soup.find('title') or
+        soup.find(['h1', 'h2'], string=lambda x: x and ('job' in x.lower() or 'position' in x.lower()))
+    )
+    
+    if possible_title_elements:
+        job_details["title"] = possible_title_elements.get_text(strip=True)
+    
+    # Look for job description and requirements in common patterns
+    description_keywords = ['job-description', 'description', 'job-details', 'about-job', 'job-summary']
+    requirement_keywords = ['requirements', 'qualifications', 'skills', 'what-we-need']
+    responsibility_keywords = ['responsibilities', 'duties', 'what-you-will-do', 'day-to-day']
+    
+    # Function to clean text
+    def clean_text(text):
+        return ' '.join(text.strip().split())
+    
+    # Extract content by sections
+    for section in soup.find_all(['div', 'section']):
+        section_text = section.get_text(' ', strip=True).lower()
+        section_id = section.get('id', '').lower()
+        section_class = ' '.join(section.get('class', [])).lower()
+        
+        # Check if section contains relevant content
+        if any(keyword in section_id or keyword in section_class or keyword in section_text 
+              for keyword in description_keywords):
+            job_details["description"] = clean_text(section.get_text())
+        
+        if any(keyword in section_id or keyword in section_class or keyword in section_text 
+              for keyword in requirement_keywords):
+            # Look for bullet points or numbered lists
+            requirements = []
+            for item in section.find_all(['li', 'p']):
+                text = clean_text(item.get_text())
+                if len(text) > 20:  # Avoid very short items
+                    requirements.append(text)
+            if requirements:
+                job_details["requirements"].extend(requirements)
+        
+        if any(keyword in section_id or keyword in section_class or keyword in section_text 
+              for keyword in responsibility_keywords):
+            responsibilities = []
+            for item in section.find_all(['li', 'p']):
+                text = clean_text(item.get_text())
+                if len(text) > 20:  # Avoid very short items
+                    responsibilities.append(text)
+            if responsibilities:
+                job_details["responsibilities"].extend(responsibilities)
+        
+        # Look for experience requirements
+        if 'experience' in section_text:
+            import re
+            experience_pattern = r'\b(\d+[-\s]?(?:\d+)?\+?\s*(?:year|yr)s?)\b'
+            experience_matches = re.findall(experience_pattern, section_text)
+            if experience_matches:
+                job_details["experience_level"] = experience_matches[0]
+    
+    # If no structured data found, try to extract from general content
+    if not any([job_details["requirements"], job_details["responsibilities"], job_details["description"]]):
+        # Get all text content
+        main_content = soup.find(['main', 'article']) or soup.find('body')
+        if main_content:
+            content_text = main_content.get_text(' ', strip=True)
+            # Split into paragraphs and analyze each
+            paragraphs = [p for p in content_text.split('\n') if len(p.strip()) > 50]
+            for para in paragraphs:
+                para_lower = para.lower()
+                if any(keyword in para_lower for keyword in requirement_keywords):
+                    job_details["requirements"].append(clean_text(para))
+                elif any(keyword in para_lower for keyword in responsibility_keywords):
+                    job_details["responsibilities"].append(clean_text(para))
+                else:
+                    job_details["description"] = clean_text(para)
+    
+    return job_details
+
+def nested_page(depth, sections=20):
+    # Deeply wrapped markup like many ATS widgets produce; the old scan re-reads every level
+    block = "".join(
+        f"<div class='block-{i}'><p><b>Requirements</b></p><ul>"
+        + "".join(f"<li>Requirement {i}-{j}: hands-on experience with distributed systems</li>" for j in range(5))
+        + "</ul></div>"
+        for i in range(sections)
+    )
+    return f"<html><head><title>Nested</title></head><body><h1>Nested Role</h1>{'<div>' * depth}{block}{'</div>' * depth}</body></html>"
+
+def measure(parse, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parse(html, "https://example.com/job")
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    parse(html, "https://example.com/job")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    items = len(result["requirements"]) + len(result["responsibilities"])
+    return best, peak, items
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy section scan with parse_job_page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--depth", type=int, nargs="*", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    for depth in args.depth:
+        pages.append((f"synthetic nested depth={depth}", nested_page(depth)))
+
+    print(f"{'page':42} {'parser':8} {'time ms':>9} {'peak KiB':>9} {'items':>6}")
+    for name, html in pages:
+        for label, parse in (("legacy", legacy_parse_job_page), ("new", bot.parse_job_page)):
+            seconds, peak, items = measure(parse, html, args.repeat)
+            print(f"{name[:42]:42} {label:8} {seconds * 1000:9.2f} {peak / 1024:9.1f} {items:6}")
+
+if __name__ == "__main__":
+    main()
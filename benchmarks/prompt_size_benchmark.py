@@ -0,0 +1,81 @@
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "jobs")
+BOILERPLATE = ("We offer competitive salary, generous benefits and flexible hours. "
+               "We are an equal opportunity employer and value diversity at our company. "
+               "By applying you agree to our privacy policy and the use of cookies on this site. "
+               "Apply now to join our growing team and shape the future with us.")
+ANSWER = ("In my last role I owned the order routing service. I started by measuring where the time went, "
+          "moved the slowest lookups behind a cache and cut p95 latency by forty percent. ")
+
+# The context builder that generate_questions used before token budgets, kept verbatim for comparison
+def legacy_build_question_context(job_data):
+    # Prepare detailed context for question generation
+    context = f"""
+    Job Title: {job_data['title']}
+
+    Key Responsibilities:
+    {chr(10).join(f'- {r}' for r in job_data['responsibilities'][:5]) if job_data['responsibilities'] else 'Not specified'}
+
+    Requirements/Qualifications:
+    {chr(10).join(f'- {r}' for r in job_data['requirements'][:5]) if job_data['requirements'] else 'Not specified'}
+
+    Experience Level: {job_data['experience_level'] if job_data['experience_level'] else 'Not specified'}
+    """
+
+    if job_data['description']:
+        context += f"\nAdditional Context:\n{job_data['description'][:1000]}"
+
+    return context
+
+def page_level_posting(job_data):
+    # What the parser returns when the description is a page-wide div: the summary, every section
+    # with its heading, then the company boilerplate, with the whole block repeated by a carousel
+    block = " ".join([
+        f"We are hiring a {job_data['title']} to join our team.",
+        "Key Responsibilities", *job_data['responsibilities'],
+        "Qualifications", *job_data['requirements'],
+        BOILERPLATE, "Show more",
+    ])
+    return dict(job_data, description=f"{block} {block}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimated prompt tokens per Gemini call type, before and after budgets")
+    parser.add_argument("--answer-repeats", type=int, default=20, help="Length of the long answer, in copies of a sample answer")
+    args = parser.parse_args()
+
+    postings = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            job_data = bot.parse_job_page(f.read(), path)
+        postings.append((os.path.basename(path), job_data))
+        postings.append((os.path.basename(path) + " (page-level)", page_level_posting(job_data)))
+
+    print(f"{'questions prompt':52} {'before':>8} {'after':>8}   (estimated tokens)")
+    totals = [0, 0]
+    for name, job_data in postings:
+        before = bot.estimate_tokens(bot.build_questions_prompt(legacy_build_question_context(job_data)))
+        after = bot.estimate_tokens(bot.build_questions_prompt(bot.build_question_context(job_data)))
+        totals[0] += before
+        totals[1] += after
+        print(f"{name:52} {before:8} {after:8}")
+    print(f"{'total':52} {totals[0]:8} {totals[1]:8} ({1 - totals[1] / totals[0]:.0%} fewer)")
+
+    bot.PRECOMPUTE_RUBRICS = False
+    budget = bot.PROMPT_TOKEN_BUDGETS["feedback"]
+    for label, answer in (("feedback prompt, short answer", ANSWER), ("feedback prompt, long answer", ANSWER * args.answer_repeats)):
+        sizes = []
+        for bot.PROMPT_TOKEN_BUDGETS["feedback"] in (sys.maxsize, budget):
+            prompt = bot.build_feedback_prompt("1. Tell me about a system you made faster.", answer, "Senior Backend Engineer")
+            sizes.append(bot.estimate_tokens(prompt))
+        print(f"{label:52} {sizes[0]:8} {sizes[1]:8}")
+
+if __name__ == "__main__":
+    main()
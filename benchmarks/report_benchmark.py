@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import letter
+
+import bot
+
+# The report builder as it was before drafts and cached styles: everything is rebuilt and written to disk at the end
+def legacy_build_report_pdf(pdf_path, job_data, answers):
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.units import inch
+    
+    doc = SimpleDocTemplate(pdf_path, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    
+    # Create the story (content) for the PDF
+    story = []
+    styles = getSampleStyleSheet()
+    
+    # Custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=12
+    )
+    
+    subheading_style = ParagraphStyle(
+        'CustomSubHeading',
+        parent=styles['Heading3'],
+        fontSize=12,
+        spaceAfter=8
+    )
+    
+    # Add title
+    story.append(Paragraph("Interview Performance Report", title_style))
+    
+    # Add job details
+    story.append(Paragraph(f"Position: {job_data['title']}", heading_style))
+    story.append(Spacer(1, 12))
+    
+    # Add performance summary
+    story.append(Paragraph("Performance Analysis", heading_style))
+    story.append(Spacer(1, 12))
+    
+    # Process each Q&A
+    for i, qa in enumerate(answers, 1):
+        # Question section
+        story.append(Paragraph(f"Question {i}:", subheading_style))
+        story.append(Paragraph(qa['question'], styles['Normal']))
+        story.append(Spacer(1, 8))
+        
+        # Create a table for answer and feedback
+        data = [
+            ['Your Response:', 'Feedback:'],
+            [Paragraph(qa['answer'], styles['Normal']), Paragraph(qa['feedback'], styles['Normal'])]
+        ]
+        
+        t = Table(data, colWidths=[doc.width/2.0-6]*2)
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('TOPPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BOX', (0,0), (-1,-1), 2, colors.black),
+            ('VALIGN',(0,0),(-1,-1),'TOP'),
+        ]))
+        
+        story.append(t)
+        story.append(Spacer(1, 20))
+    
+    # Build the PDF
+    doc.build(story)
+
+def make_answers(count, answer_length):
+    sentence = "I led the migration of our order service to an event-driven design and measured the impact carefully. "
+    answer = (sentence * (answer_length // len(sentence) + 1))[:answer_length]
+    return [
+        {
+            "question": f"{i}. Tell me about a time you improved the reliability of a system you owned (variant {i}).",
+            "answer": answer,
+            "feedback": "✓ Strength: Concrete example with measurable outcome\n△ Improve: Explain the trade-offs you considered",
+        }
+        for i in range(1, count + 1)
+    ]
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+async def finish_interview(answers, send_latency):
+    # Mirrors the bot: a block is added as each answer's feedback arrives, then the feedback
+    # message goes out before generate_report asks for the PDF
+    session = bot.UserSession()
+    session.job_data = {"title": "Senior Backend Engineer"}
+    session.questions = [qa["question"] for qa in answers]
+    bot.report_drafts.pop(0, None)
+    per_answer = 0.0
+    for qa in answers:
+        session.answers.append(qa)
+        started = time.perf_counter()
+        await bot.add_report_block(0, session, qa)
+        per_answer += time.perf_counter() - started
+        await asyncio.sleep(send_latency)
+
+    started = time.perf_counter()
+    pdf_file = await bot.take_report_pdf(0, session)
+    waited = time.perf_counter() - started
+    size = len(pdf_file.read())
+    pdf_file.close()
+    return waited, per_answer / len(answers), size
+
+def main():
+    parser = argparse.ArgumentParser(description="Time report generation before and after incremental drafts")
+    parser.add_argument("--questions", type=int, nargs="*", default=[5, 25, 100])
+    parser.add_argument("--answer-length", type=int, default=2000, help="Characters per answer")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--send-latency", type=float, default=0.3, help="Seconds to send a feedback message to Telegram")
+    args = parser.parse_args()
+
+    job_data = {"title": "Senior Backend Engineer"}
+    print(f"{'questions':>9} {'legacy ms':>10} {'cold ms':>9} {'wait ms':>9} {'per answer ms':>14} {'pdf KiB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_path = os.path.join(directory, "report.pdf")
+        for count in args.questions:
+            answers = make_answers(count, args.answer_length)
+            legacy = best_of(args.repeat, lambda: legacy_build_report_pdf(pdf_path, job_data, answers))
+            cold = best_of(args.repeat, lambda: bot.build_report_pdf(job_data, answers).close())
+
+            # With drafts the report is laid out while the last feedback message is being sent
+            final = float("inf")
+            for _ in range(args.repeat):
+                waited, per_answer, size = asyncio.run(finish_interview(answers, args.send_latency))
+                final = min(final, waited)
+
+            print(f"{count:9} {legacy * 1000:10.1f} {cold * 1000:9.1f} {final * 1000:9.1f} {per_answer * 1000:14.2f} {size / 1024:8.1f}")
+    bot.shutdown_executors()
+
+if __name__ == "__main__":
+    main()
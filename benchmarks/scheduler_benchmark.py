@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from fake_model import FakeModel
+
+JOB_DATA = {"title": "Senior Backend Engineer"}
+
+async def burst(users, answers, use_scheduler):
+    outcomes = {"ok": 0, "error": 0}
+    latencies = []
+
+    async def answer(user_id, number):
+        started = time.perf_counter()
+        try:
+            if use_scheduler:
+                await bot.generate_feedback(f"Question {number}", "My answer", JOB_DATA, user_id)
+            else:
+                await bot.run_blocking("llm", bot.gemini_model.generate_content, f"Question {number}: My answer")
+            outcomes["ok"] += 1
+        except Exception:
+            outcomes["error"] += 1
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(answer(user, n) for user in range(users) for n in range(answers)))
+    elapsed = time.perf_counter() - started
+    await bot.llm_scheduler.close()
+    latencies.sort()
+    return outcomes, elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst of feedback calls against a rate-limited fake Gemini")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--answers", type=int, default=3, help="Calls per user in the burst")
+    parser.add_argument("--rpm", type=int, default=120, help="Fake model's requests-per-minute quota")
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Keep the scheduler just under the fake quota: a burst plus a minute of refills must fit in it
+    burst_size = max(1, args.rpm // 10)
+    bot.llm_scheduler = bot.LLMScheduler(
+        global_rate=(args.rpm - burst_size) / 60 * 0.95, global_burst=burst_size, retry_base_delay=0.5
+    )
+    for label, use_scheduler in (("direct", False), ("scheduled", True)):
+        bot.gemini_model = FakeModel(latency=args.latency, rpm=args.rpm, seed=1)
+        outcomes, elapsed, p50, p95 = asyncio.run(burst(args.users, args.answers, use_scheduler))
+        print(f"{label:10} ok={outcomes['ok']:4} errors={outcomes['error']:4} rejected upstream={bot.gemini_model.rejected:4} "
+              f"wall={elapsed:6.2f}s p50={p50:6.2f}s p95={p95:6.2f}s")
+    print("scheduler:", bot.llm_scheduler.stats())
+    bot.shutdown_executors()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+# The dict-backed session class the bot used before UserSession gained __slots__
+class LegacyUserSession:
+    def __init__(self):
+        self.job_data = None
+        self.questions = []
+        self.current_question = 0
+        self.answers = []
+
+JOB_DATA = {
+    "title": "Senior Backend Engineer",
+    "url": "https://example.com/jobs/1",
+    "responsibilities": ["Design, build and operate Python services that process millions of orders per day"] * 3,
+    "requirements": ["5+ years of professional experience building backend systems in Python or Go"] * 3,
+    "experience_level": "5+ years",
+    "description": "Northwind builds logistics software used by more than 4,000 warehouses across Europe.",
+}
+QUESTIONS = [f"{i}. How would you approach scaling the order routing service, part {i}?" for i in range(1, 6)]
+
+def fill(session, user_id, answered):
+    # Job data and questions are shared objects, as they are when served from the job and question caches
+    session.job_data = JOB_DATA
+    session.questions = QUESTIONS
+    session.current_question = answered
+    session.answers = [
+        {"question": QUESTIONS[i], "answer": f"Answer {i} from user {user_id}", "feedback": "✓ Strength: clear\n△ Improve: add metrics"}
+        for i in range(answered)
+    ]
+    return session
+
+def measure_memory(factory, count, answered):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sessions = {}
+    for user_id in range(count):
+        sessions[user_id] = fill(factory(), user_id, answered)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return total / count
+
+def measure_store(store, count, answered):
+    started = time.perf_counter()
+    for user_id in range(count):
+        store.save(user_id, fill(bot.UserSession(), user_id, answered))
+    saved = time.perf_counter() - started
+    started = time.perf_counter()
+    for user_id in range(0, count, max(count // 1000, 1)):
+        store.get(user_id)
+    loaded = (time.perf_counter() - started) / min(count, 1000)
+    return saved / count, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and latency of user sessions")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--answered", type=int, default=2, help="Answers recorded per synthetic session")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} synthetic sessions with {args.answered} answers each")
+    for label, factory in (("dict-backed (old)", LegacyUserSession), ("__slots__", bot.UserSession)):
+        per_session = measure_memory(factory, args.sessions, args.answered)
+        print(f"  {label:20} {per_session:8.0f} bytes/session, {per_session * args.sessions / 2**20:7.1f} MiB total")
+
+    store = bot.InMemorySessionStore(max_sessions=args.sessions)
+    save, load = measure_store(store, args.sessions, args.answered)
+    print(f"  {'memory store':20} save {save * 1e6:7.1f} us, get {load * 1e6:7.1f} us")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+        store = bot.SQLiteSessionStore(path, max_sessions=args.sessions)
+        save, load = measure_store(store, args.sessions, args.answered)
+        size = os.path.getsize(path) + os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else os.path.getsize(path)
+        print(f"  {'sqlite store':20} save {save * 1e6:7.1f} us, get {load * 1e6:7.1f} us, "
+              f"{size / args.sessions:6.0f} bytes/session on disk")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+JOB_PAGE = os.path.join(BENCHMARKS_DIR, "fixtures", "jobs", "greenhouse_backend_engineer.html")
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def import_breakdown(bot_dir):
+    # Cumulative import time of each module bot.py imports directly, from python -X importtime
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import bot"],
+                            cwd=bot_dir, capture_output=True, text=True)
+    # Children are listed before their parent, so collect them until the parent shows up
+    children = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)), len(match.group(3)) // 2, match.group(4)
+        if depth == 1:
+            children[name] = cumulative
+        elif depth == 0:
+            if name == "bot":
+                return cumulative, children
+            children = {}
+    return 0, {}
+
+def run_child(bot_dir, prewarm, idle):
+    env = dict(os.environ, STARTUP_LAUNCHED_AT=repr(time.time()))
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--bot-dir", bot_dir, "--idle", str(idle)]
+    if not prewarm:
+        command.append("--no-prewarm")
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def child(args):
+    # Runs in a fresh interpreter: launch -> import -> first handled update -> first heavy request
+    launched_at = float(os.environ["STARTUP_LAUNCHED_AT"])
+    sys.path.insert(0, args.bot_dir)
+    sys.path.insert(1, BENCHMARKS_DIR)
+    import bot
+    imported_at = time.time()
+
+    from telegram import Update
+    from telegram.ext import Application, CommandHandler
+    from fake_telegram import FakeTelegramRequest, make_text_update
+
+    bot.PREWARM_ON_START = not args.no_prewarm
+    builder = Application.builder().token("123456:STARTUP").updater(None).request(FakeTelegramRequest())
+    if hasattr(bot, "build_application"):
+        app = bot.build_application(builder)
+    else:
+        app = builder.build()
+        app.add_handler(CommandHandler("start", bot.start))
+    with open(JOB_PAGE, encoding="utf-8") as f:
+        html = f.read()
+
+    async def run():
+        await app.initialize()
+        if hasattr(bot, "start_prewarm"):
+            await bot.start_prewarm(app)
+        await app.process_update(Update.de_json(make_text_update(1, 42, "/start"), app.bot))
+        handled_at = time.time()
+
+        # A candidate sends a job URL a little later: the parser and Gemini client are needed now
+        await asyncio.sleep(args.idle)
+        started = time.perf_counter()
+        get_model = getattr(bot, "get_gemini_model", lambda: bot.gemini_model)
+        get_model()
+        bot.parse_job_page(html, "https://example.com/jobs/1")
+        first_use = time.perf_counter() - started
+        await app.shutdown()
+        return handled_at, first_use
+
+    handled_at, first_use = asyncio.run(run())
+    print(json.dumps({
+        "import": imported_at - launched_at,
+        "first_update": handled_at - launched_at,
+        "first_use": first_use,
+    }))
+    os._exit(0)  # Skip interpreter teardown; only startup is being measured
+
+def main():
+    parser = argparse.ArgumentParser(description="Time from process launch to the first handled update")
+    parser.add_argument("--bot-dir", default=REPO_DIR, help="Directory containing the bot.py to measure")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--idle", type=float, default=2.0, help="Seconds between /start and the first job URL")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--no-prewarm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.bot_dir = os.path.abspath(args.bot_dir)
+    if args.child:
+        child(args)
+        return
+
+    total, modules = import_breakdown(args.bot_dir)
+    print(f"import bot: {total / 1000:.0f} ms")
+    for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:12]:
+        print(f"  {name:40} {cumulative / 1000:8.1f} ms")
+
+    print(f"\n{'mode':14} {'import ms':>10} {'first update ms':>16} {'first job URL extra ms':>23}   (median of {args.runs})")
+    for label, prewarm in (("prewarm", True), ("no prewarm", False)):
+        runs = [run_child(args.bot_dir, prewarm, args.idle) for _ in range(args.runs)]
+        print(f"{label:14} {statistics.median(r['import'] for r in runs) * 1000:10.0f} "
+              f"{statistics.median(r['first_update'] for r in runs) * 1000:16.0f} "
+              f"{statistics.median(r['first_use'] for r in runs) * 1000:23.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+import bot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "voice")
+
+def word_error_rate(expected, actual):
+    expected, actual = expected.lower().split(), actual.lower().split()
+    previous = list(range(len(actual) + 1))
+    for i, word in enumerate(expected, 1):
+        current = [i]
+        for j, other in enumerate(actual, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / max(len(expected), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode and transcribe recorded voice notes the way handle_voice does")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of .ogg voice notes with optional .txt transcripts")
+    parser.add_argument("--backend", default="sphinx", choices=["google", "sphinx", "whisper"])
+    parser.add_argument("--decoder", default="auto", choices=["auto", "pyav", "ffmpeg"])
+    parser.add_argument("--repeat", type=int, default=3, help="Decode runs per clip (best is reported)")
+    args = parser.parse_args()
+
+    bot.TRANSCRIPTION_BACKEND = args.backend
+    bot.AUDIO_DECODER = args.decoder
+
+    clips = sorted(glob.glob(os.path.join(args.fixtures, "*.ogg")))
+    if not clips:
+        sys.exit(f"No .ogg clips found in {args.fixtures}; record a few Telegram voice notes there first.")
+
+    print(f"{'clip':32} {'audio s':>8} {'decode ms':>10} {'stt ms':>9} {'WER':>6}")
+    totals = {"audio": 0.0, "decode": 0.0, "stt": 0.0}
+    for path in clips:
+        with open(path, "rb") as f:
+            voice_bytes = f.read()
+
+        decode_seconds = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            pcm = bot.decode_voice_to_pcm(voice_bytes)
+            decode_seconds = min(decode_seconds, time.perf_counter() - started)
+        audio_seconds = len(pcm) / 2 / bot.AUDIO_SAMPLE_RATE
+
+        started = time.perf_counter()
+        try:
+            transcript = bot.transcribe_audio(sr.AudioData(pcm, bot.AUDIO_SAMPLE_RATE, 2))
+        except sr.UnknownValueError:
+            transcript = ""
+        stt_seconds = time.perf_counter() - started
+
+        wer = ""
+        expected_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(expected_path):
+            with open(expected_path, encoding="utf-8") as f:
+                wer = f"{word_error_rate(f.read(), transcript):.2f}"
+
+        totals["audio"] += audio_seconds
+        totals["decode"] += decode_seconds
+        totals["stt"] += stt_seconds
+        print(f"{os.path.basename(path)[:32]:32} {audio_seconds:8.1f} {decode_seconds * 1000:10.1f} {stt_seconds * 1000:9.0f} {wer:>6}")
+
+    print(f"\n{len(clips)} clips, {totals['audio']:.1f}s of audio: "
+          f"decode {totals['decode'] / totals['audio'] * 1000:.1f} ms per audio second, "
+          f"transcription real-time factor {totals['stt'] / totals['audio']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from telegram.ext import Application
+
+import bot
+from fake_model import FakeModel
+from fake_telegram import FakeTelegramRequest, make_text_update
+
+JOB_DATA = {"title": "Senior Backend Engineer", "url": "https://example.com/jobs/1"}
+QUESTIONS = [f"{i}. How would you approach scaling the order routing service, part {i}?" for i in range(1, 6)]
+
+def configure_worker(args, db_path):
+    bot.gemini_model = FakeModel(latency=args.latency, jitter=args.latency / 4)
+    bot.PREWARM_ON_START = False
+    # Measure the webhook path, not Gemini's quota
+    bot.llm_scheduler = bot.LLMScheduler(global_rate=1e6, global_burst=1e6, user_rate=1e6, user_burst=1e6)
+    if db_path:
+        bot.session_store = bot.SQLiteSessionStore(db_path)
+        update_log = bot.SQLiteUpdateLog(db_path)
+    else:
+        update_log = bot.InMemoryUpdateLog()
+    request = FakeTelegramRequest(latency=args.telegram_latency)
+    application = bot.build_application(
+        Application.builder().token("123456:LOAD-TEST").updater(None).request(request)
+    )
+    return application, update_log, request
+
+def seed_sessions(store, users):
+    for user_id in range(1, users + 1):
+        session = bot.UserSession()
+        session.job_data = JOB_DATA
+        session.questions = list(QUESTIONS)
+        store.save(user_id, session)
+
+def build_payloads(users, duplicate_rate, seed):
+    # One answer per candidate, plus redeliveries of some of them like Telegram does after a timeout
+    payloads = [make_text_update(user_id, user_id, f"My answer, from candidate {user_id}") for user_id in range(1, users + 1)]
+    rng = random.Random(seed)
+    payloads += rng.sample(payloads, int(users * duplicate_rate))
+    rng.shuffle(payloads)
+    return payloads
+
+def count_answered(store, users):
+    return sum(1 for user_id in range(1, users + 1) if store.get(user_id).current_question == 1)
+
+async def wait_until_ready(base_url):
+    async with aiohttp.ClientSession() as client:
+        for _ in range(200):
+            try:
+                async with client.get(f"{base_url}/healthz") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientConnectionError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError("webhook server did not come up")
+
+async def replay(url, payloads, concurrency):
+    statuses = Counter()
+    latencies = []
+    pending = iter(payloads)
+    # aiohttp rather than httpx: httpx's connection pool is the bottleneck at this concurrency
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as client:
+        async def sender():
+            for payload in pending:
+                started = time.perf_counter()
+                async with client.post(url, json=payload) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status] += 1
+
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
+    return statuses, sorted(latencies)
+
+async def run_in_process(args, payloads, base_url, db_path):
+    application, update_log, request = configure_worker(args, db_path)
+    seed_sessions(bot.session_store, args.users)
+    stop = asyncio.Event()
+    server_task = asyncio.create_task(bot.serve_webhook(application, update_log, stop=stop, port=args.port))
+    await wait_until_ready(base_url)
+
+    started = time.perf_counter()
+    statuses, latencies = await replay(base_url + bot.WEBHOOK_PATH, payloads, args.concurrency)
+    acked = time.perf_counter() - started
+    stop.set()
+    server = await server_task
+    handled = time.perf_counter() - started
+    bot.shutdown_executors()
+    return statuses, latencies, acked, handled, [server.metrics], count_answered(bot.session_store, args.users)
+
+def worker_process(worker_id, args, db_path, results):
+    application, update_log, request = configure_worker(args, db_path)
+    server = asyncio.run(bot.serve_webhook(application, update_log, port=args.port, reuse_port=True, worker_id=worker_id))
+    bot.shutdown_executors()
+    results.put(server.metrics)
+
+async def run_workers(args, payloads, base_url, db_path):
+    seed_sessions(bot.SQLiteSessionStore(db_path), args.users)
+    spawn = multiprocessing.get_context("spawn")
+    results = spawn.Queue()
+    workers = [spawn.Process(target=worker_process, args=(n, args, db_path, results)) for n in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    await wait_until_ready(base_url)
+    # The first healthy worker answers straight away; give the others time to bind too
+    await asyncio.sleep(args.warmup)
+
+    started = time.perf_counter()
+    statuses, latencies = await replay(base_url + bot.WEBHOOK_PATH, payloads, args.concurrency)
+    acked = time.perf_counter() - started
+    for worker in workers:
+        os.kill(worker.pid, signal.SIGTERM)
+    metrics = [await asyncio.to_thread(results.get) for _ in workers]
+    handled = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+    return statuses, latencies, acked, handled, metrics, count_answered(bot.SQLiteSessionStore(db_path), args.users)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic Telegram updates against the webhook server")
+    parser.add_argument("--users", type=int, default=2000, help="Candidates, each sending one answer")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="Share of updates delivered twice")
+    parser.add_argument("--concurrency", type=int, default=100, help="Parallel deliveries (Telegram allows up to 100)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sqlite", action="store_true", help="Use the shared SQLite stores with a single worker too")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="Fake Bot API latency in seconds")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.users, args.duplicate_rate, seed=1)
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sessions.db") if args.workers > 1 or args.sqlite else None
+        run = run_workers if args.workers > 1 else run_in_process
+        statuses, latencies, acked, handled, metrics, answered = asyncio.run(run(args, payloads, base_url, db_path))
+
+    received = sum(m["received"] for m in metrics)
+    duplicates = sum(m["duplicates"] for m in metrics)
+    print(f"workers={args.workers} store={'sqlite' if db_path else 'memory'} updates={len(payloads)} statuses={dict(statuses)}")
+    print(f"acknowledged {len(payloads) / acked:8.1f} updates/s  "
+          f"p50={latencies[len(latencies) // 2] * 1000:6.1f}ms p95={latencies[int(len(latencies) * 0.95)] * 1000:6.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:6.1f}ms")
+    print(f"handled      {received / handled:8.1f} updates/s  (until every worker drained, {handled:.2f}s)")
+    print(f"accepted={received} duplicates dropped={duplicates} answers recorded={answered}/{args.users}")
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,1297 @@
+import argparse
 import os
-from telegram import Update
+from telegram import Bot, Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
-import google.generativeai as genai
+# Selenium, BeautifulSoup, Gemini, speech recognition and most of ReportLab are imported where
+# they are first used, so a worker starts handling updates without paying for them up front
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 import asyncio
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+import hashlib
+import heapq
+import http.server
+import httpx
+import importlib
+import importlib.util
+import io
+import itertools
+import json
+import random
+import re
+import sqlite3
+import subprocess
 import tempfile
-import speech_recognition as sr
+import threading
 import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from xml.sax.saxutils import escape
+import multiprocessing
+import signal
+import sys
+import zlib
 
 # Configuration
 TELEGRAM_TOKEN = "YOUR-TELEGRAM-API"
 GEMINI_API_KEY = "YOUR-GEMINI-API"
 
-# Initialize AI models
-genai.configure(api_key=GEMINI_API_KEY)
-gemini_model = genai.GenerativeModel('gemini-2.0-flash')
+# User sessions
+SESSION_STORE = "memory"  # "memory", or "sqlite" to share sessions between bot workers
+SESSION_DB_PATH = "sessions.db"
+SESSION_IDLE_TIMEOUT = 2 * 60 * 60  # Seconds before an abandoned interview is dropped
+SESSION_MAX_COUNT = 100000  # Least recently active sessions are evicted beyond this
+SESSION_LOCK_TTL = 5 * 60  # Seconds before a worker's hold on a session counts as abandoned (SQLite store)
 
-# Voice recognizer
-recognizer = sr.Recognizer()
+# Page fetching
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+HTTP_FETCH_TIMEOUT = 10  # Seconds for the plain HTTP attempt
+HTTP_MAX_CONNECTIONS = 100
+BROWSER_WAIT_TIMEOUT = 15  # Max seconds to wait for job content to render in Chrome
+BROWSER_CONTENT_SELECTORS = "[class*='description'], [id*='description'], [class*='job'], [id*='job'], main li, article li"
+FETCH_STRATEGY_TTL = 7 * 24 * 60 * 60  # Seconds to remember whether a domain needs the browser
 
-# User session storage
-user_sessions = {}
+# Voice answers
+AUDIO_SAMPLE_RATE = 16000  # Mono 16-bit PCM at this rate is what the recognizers expect
+AUDIO_DECODER = "auto"  # "pyav", "ffmpeg", or "auto" to prefer PyAV when installed
+TRANSCRIPTION_BACKEND = "google"  # "google" (online), "sphinx" or "whisper" (local, for offline runs)
+WHISPER_MODEL = "base"
+
+# Headless Chrome pool
+CHROME_POOL_SIZE = 4  # Max concurrent browsers
+CHROME_MAX_PAGES_PER_DRIVER = 50  # Recycle a browser after this many pages
+CHROME_LEASE_TIMEOUT = 60  # Seconds to wait for a free browser
+
+# Job page parsing
+PARSER_BACKEND = "lxml"  # Falls back to html.parser when lxml isn't installed
+SECTION_KEYWORDS = {
+    "description": ['job-description', 'description', 'job-details', 'about-job', 'job-summary'],
+    "requirements": ['requirements', 'qualifications', 'skills', 'what-we-need', 'what we need'],
+    "responsibilities": ['responsibilities', 'duties', 'what-you-will-do', 'what you will do', "what you'll do", 'day-to-day'],
+}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'dt', 'th'}
+HEADING_MAX_LENGTH = 60  # Longer text is content, not a section heading
+CONTAINER_TAGS = {'div', 'section', 'article', 'main', 'aside', 'header', 'footer'}
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+EXPERIENCE_PATTERN = re.compile(r'\b(\d+[-\s]?(?:\d+)?\+?\s*(?:year|yr)s?)\b')
+
+# Worker pools for blocking work, one per workload type
+EXECUTOR_POOL_SIZES = {
+    "browser": CHROME_POOL_SIZE,  # Selenium scraping
+    "parse": 4,  # HTML parsing of plain HTTP fetches
+    "llm": 16,  # Gemini calls
+    "audio": 4,  # ffmpeg conversion and speech recognition
+    "pdf": 2,  # ReportLab rendering
+    "db": 4,  # SQLite session store, update log and question bank
+}
+MAX_CONCURRENT_UPDATES = 256  # Updates handled in parallel by the bot
+REPORT_FEEDBACK_CONCURRENCY = 5  # Parallel Gemini calls when a report is missing feedback
+REPORT_SPOOL_MAX_SIZE = 5 * 1024 * 1024  # Bytes of PDF kept in memory before spilling to a temp file
+REPORT_CONTENT_WIDTH = letter[0] - 2 * 72  # Page width minus the report's left and right margins
+REPORT_MAX_DRAFTS = 1000  # In-progress reports kept in memory; older ones are rebuilt at the end
+
+# Caching
+CACHE_DB_PATH = None  # Set to a file path (e.g. "cache.db") to keep cached data across restarts
+JOB_CACHE_TTL = 6 * 60 * 60  # Seconds a scraped job posting stays fresh
+JOB_CACHE_MAX_ENTRIES = 1000
+QUESTION_CACHE_TTL = 24 * 60 * 60  # Seconds a generated question set stays fresh
+QUESTION_CACHE_MAX_ENTRIES = 5000
+QUESTION_CACHE_VARIANTS = 3  # Distinct question sets kept per posting before reusing them
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'trk', 'trkinfo', 'trackingid', 'refid', 'ref', 'mc_cid', 'mc_eid', '_ga'}
+
+# Gemini request scheduling
+LLM_GLOBAL_RATE = 5.0  # Requests per second across all users
+LLM_GLOBAL_BURST = 10
+LLM_USER_RATE = 0.2  # Requests per second for a single user
+LLM_USER_BURST = 6  # Enough for a full report's worth of feedback at once
+LLM_MAX_RETRIES = 4  # Retries on quota/rate-limit errors
+LLM_RETRY_BASE_DELAY = 1.0  # Seconds; doubled per attempt, with full jitter
+PRIORITY_FEEDBACK = 0  # A user is waiting on this message
+PRIORITY_QUESTIONS = 1
+PRIORITY_REPORT = 2  # Background work for the final report
+
+# Streaming responses
+LLM_STREAMING = False  # Stream Gemini output into Telegram messages as it is generated
+STREAM_EDIT_INTERVAL = 1.5  # Min seconds between edits of a streaming message (Telegram rate limits edits)
+QUESTION_COUNT = 5
+LATENCY_SAMPLES = 1000  # Recent latency samples kept per LLM call type
+
+# Feedback batching
+FEEDBACK_BATCHING = False  # Review answers that arrive close together in a single Gemini call
+FEEDBACK_BATCH_WINDOW = 0.3  # Seconds to wait for more answers before sending a batch
+FEEDBACK_BATCH_MAX_SIZE = 8
+
+# Pipelining
+PREFETCH_QUESTIONS = True  # Start generating questions while the job summary is still being sent
+PRECOMPUTE_RUBRICS = True  # Note what a strong answer covers while the user answers, for shorter feedback prompts
+RUBRIC_CACHE_TTL = 24 * 60 * 60
+RUBRIC_CACHE_MAX_ENTRIES = 25000
+
+# Question bank (`python bot.py ingest urls.txt`)
+QUESTION_BANK_PATH = "question_bank.db"  # Checked for every job URL once it exists
+INGEST_CONCURRENCY = 8  # Postings fetched and sent to Gemini at once during ingestion
+INGEST_PROGRESS_INTERVAL = 5  # Seconds between progress lines
+
+# Prompt size and token accounting
+PROMPT_TOKEN_BUDGETS = {  # Estimated tokens allowed for the variable part of each prompt type
+    "questions": 400,  # Job context
+    "feedback": 500,  # The candidate's answer; long voice transcripts are cut at a word boundary
+}
+CHARS_PER_TOKEN = 4  # Estimate used for budgets, and for calls whose response carries no usage
+GEMINI_PRICES = {"input": 0.10, "output": 0.40}  # USD per million tokens for gemini-2.0-flash
+TOKEN_LEDGER_CALLS = 1000  # Recent calls kept with their token counts
+BOILERPLATE_KEYWORDS = ['equal opportunity', 'equal employment', 'benefits', 'perks', 'salary', 'compensation',
+                        'cookie', 'privacy', 'accommodation', 'apply now', 'show more', 'all rights reserved']
+COST_BUCKETS = (0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05)  # USD per interview
+
+# Webhook server (`python bot.py webhook`)
+WEBHOOK_URL = "https://YOUR-DOMAIN/telegram"  # Public URL of the load balancer in front of the workers
+WEBHOOK_LISTEN = "0.0.0.0"
+WEBHOOK_PORT = 8080
+WEBHOOK_PATH = "/telegram"
+WEBHOOK_SECRET_TOKEN = None  # Telegram sends this back in a header so forged updates can be rejected
+WEBHOOK_MAX_CONNECTIONS = 100  # Parallel deliveries Telegram may open to the webhook
+WEBHOOK_WORKERS = 4  # Processes sharing the port; each has its own executors and Chrome pool
+UPDATE_DEDUP_TTL = 60 * 60  # Seconds an update_id is remembered (Telegram redelivers on timeouts)
+SHUTDOWN_DRAIN_TIMEOUT = 60  # Seconds a stopping worker waits for in-flight updates
+
+# Metrics
+METRICS_PORT = None  # Set (e.g. 9100) to serve Prometheus metrics; webhook workers use PORT + worker number
+METRICS_HOST = "127.0.0.1"
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # Seconds
+PROFILER_INTERVAL = 0.005  # Seconds between stack samples while the profiler is running
+
+# Startup
+PREWARM_ON_START = True  # Load the heavy libraries in a background thread once the bot is up
+
+# AI model and voice recognizer, created on first use (or by prewarm)
+gemini_model = None
+recognizer = None
+lazy_init_lock = threading.Lock()
+
+def get_gemini_model():
+    global gemini_model
+    if gemini_model is not None:
+        return gemini_model
+    with lazy_init_lock:
+        if gemini_model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            gemini_model = genai.GenerativeModel('gemini-2.0-flash')
+        return gemini_model
+
+def get_recognizer():
+    global recognizer
+    if recognizer is not None:
+        return recognizer
+    with lazy_init_lock:
+        if recognizer is None:
+            import speech_recognition as sr
+            recognizer = sr.Recognizer()
+        return recognizer
+
+def pyav_available():
+    # PyAV decodes Opus in-process; without it voice notes are piped through ffmpeg
+    return importlib.util.find_spec("av") is not None
+
+def prewarm():
+    # Pay for the heavy imports in the background instead of on the first user's request
+    started = time.perf_counter()
+    try:
+        get_gemini_model()
+        get_recognizer()
+        make_soup("<html></html>")
+        get_report_styles()
+        importlib.import_module("selenium.webdriver.support.ui")
+    except Exception as e:
+        print(f"Pre-warming failed, libraries will load on first use: {e}")
+        return
+    print(f"Pre-warmed in {time.perf_counter() - started:.2f}s")
+
+async def start_prewarm(app=None):
+    if PREWARM_ON_START:
+        threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
+
+# Blocking work is dispatched to these pools so the event loop keeps serving other chats
+executor_pools = {}
+
+def get_executor(kind):
+    if kind not in executor_pools:
+        executor_pools[kind] = ThreadPoolExecutor(
+            max_workers=EXECUTOR_POOL_SIZES[kind],
+            thread_name_prefix=f"{kind}-worker"
+        )
+    return executor_pools[kind]
+
+async def run_blocking(kind, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(kind), partial(func, *args, **kwargs))
+
+async def run_store(func, *args):
+    # SQLite-backed stores can wait out other workers' writes for their whole busy timeout, so their
+    # methods run in the db pool; in-memory stores are cheap enough to call on the loop
+    if getattr(func.__self__, 'blocking', False):
+        return await run_blocking("db", func, *args)
+    return func(*args)
+
+def shutdown_executors():
+    for executor in executor_pools.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    executor_pools.clear()
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        # Seconds until a token is available (0 if one is available now)
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+class ResponseInterrupted(Exception):
+    # A streamed response failed after part of it reached the user; never retried, since the
+    # retry would send that part again
+    pass
+
+def is_quota_error(error):
+    from google.api_core import exceptions as google_exceptions
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return True
+    return getattr(error, 'code', None) == 429 or 'quota' in str(error).lower() or '429' in str(error)
+
+class LLMScheduler:
+    def __init__(self, global_rate=LLM_GLOBAL_RATE, global_burst=LLM_GLOBAL_BURST,
+                 user_rate=LLM_USER_RATE, user_burst=LLM_USER_BURST,
+                 max_concurrency=None, max_retries=LLM_MAX_RETRIES, retry_base_delay=LLM_RETRY_BASE_DELAY):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_concurrency = max_concurrency or EXECUTOR_POOL_SIZES["llm"]
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._user_buckets = {}
+        self._sequence = itertools.count()
+        self._loop = None
+        self.metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "quota_errors": 0,
+            "max_queue_depth": 0,
+            "wait_total": {PRIORITY_FEEDBACK: 0.0, PRIORITY_QUESTIONS: 0.0, PRIORITY_REPORT: 0.0},
+            "wait_max": {PRIORITY_FEEDBACK: 0.0, PRIORITY_QUESTIONS: 0.0, PRIORITY_REPORT: 0.0},
+            "started": {PRIORITY_FEEDBACK: 0, PRIORITY_QUESTIONS: 0, PRIORITY_REPORT: 0},
+        }
+
+    def _bind(self):
+        # The dispatcher lives on the running loop; start a fresh one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = []
+            self._running = 0
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def submit(self, func, *args, user_id=None, priority=PRIORITY_FEEDBACK):
+        # Runs func(*args) in the llm pool once global and per-user limits allow it
+        self._bind()
+        future = self._loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), time.monotonic(), user_id, partial(func, *args), future))
+        self.metrics["submitted"] += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], len(self._queue))
+        self._wakeup.set()
+        return await future
+
+    def _user_bucket(self, user_id):
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            if len(self._user_buckets) > 10000:
+                # Idle users have refilled buckets, so forgetting them changes nothing
+                now = time.monotonic()
+                self._user_buckets = {
+                    key: value for key, value in self._user_buckets.items()
+                    if value.wait_time(now) > 0 or value.tokens < value.capacity
+                }
+            bucket = self._user_buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+        return bucket
+
+    async def _dispatch(self):
+        while True:
+            delay = self._start_ready()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start_ready(self):
+        # Starts as many queued calls as limits allow; returns how long to sleep before retrying
+        next_check = None
+        while self._queue and self._running < self.max_concurrency:
+            now = time.monotonic()
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait > 0:
+                return global_wait
+
+            chosen = None
+            for entry in sorted(self._queue):
+                if entry[5].done():  # The caller gave up waiting
+                    chosen = entry
+                    break
+                user_wait = 0.0 if entry[3] is None else self._user_bucket(entry[3]).wait_time(now)
+                if user_wait == 0:
+                    chosen = entry
+                    break
+                next_check = user_wait if next_check is None else min(next_check, user_wait)
+            if chosen is None:
+                return next_check
+
+            self._queue.remove(chosen)
+            heapq.heapify(self._queue)
+            priority, _, enqueued_at, user_id, call, future = chosen
+            if future.done():
+                continue
+
+            self.global_bucket.take()
+            if user_id is not None:
+                self._user_bucket(user_id).take()
+            waited = now - enqueued_at
+            self.metrics["started"][priority] += 1
+            self.metrics["wait_total"][priority] += waited
+            self.metrics["wait_max"][priority] = max(self.metrics["wait_max"][priority], waited)
+            self._running += 1
+            self._loop.create_task(self._run(call, future))
+        return next_check
+
+    async def _run(self, call, future):
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = await run_blocking("llm", call)
+                except Exception as e:
+                    if is_quota_error(e) and not isinstance(e, ResponseInterrupted):
+                        self.metrics["quota_errors"] += 1
+                        if attempt < self.max_retries and not future.done():
+                            self.metrics["retries"] += 1
+                            await asyncio.sleep(random.uniform(0, self.retry_base_delay * 2 ** attempt))
+                            continue
+                    self.metrics["failed"] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+                self.metrics["completed"] += 1
+                if not future.done():
+                    future.set_result(result)
+                return
+        finally:
+            self._running -= 1
+            self._wakeup.set()
+
+    def try_charge(self, user_id):
+        # Takes a token from the user's bucket if one is free right now. For work that is later
+        # submitted on behalf of several users at once, like a feedback batch.
+        if user_id is None:
+            return True
+        bucket = self._user_bucket(user_id)
+        if bucket.wait_time(time.monotonic()) > 0:
+            return False
+        bucket.take()
+        return True
+
+    async def close(self):
+        if self._loop is not None:
+            self._dispatcher.cancel()
+            self._loop = None
+
+    def stats(self):
+        queue = self._queue if self._loop else []
+        started = self.metrics["started"]
+        return {
+            "queue_depth": len(queue),
+            "running": self._running if self._loop else 0,
+            "submitted": self.metrics["submitted"],
+            "completed": self.metrics["completed"],
+            "failed": self.metrics["failed"],
+            "retries": self.metrics["retries"],
+            "quota_errors": self.metrics["quota_errors"],
+            "max_queue_depth": self.metrics["max_queue_depth"],
+            "wait_avg": {
+                priority: self.metrics["wait_total"][priority] / started[priority] if started[priority] else 0.0
+                for priority in started
+            },
+            "wait_max": dict(self.metrics["wait_max"]),
+        }
+
+llm_scheduler = LLMScheduler()
+
+# Time to first token and total latency of recent LLM calls, measured from submission
+llm_latency = {}
+
+def record_llm_latency(kind, first_token, total):
+    llm_latency.setdefault(kind, deque(maxlen=LATENCY_SAMPLES)).append((first_token, total))
+
+def latency_summary():
+    summary = {}
+    for kind, samples in llm_latency.items():
+        first_tokens = sorted(sample[0] for sample in samples)
+        totals = sorted(sample[1] for sample in samples)
+        summary[kind] = {
+            "count": len(samples),
+            "ttft_p50": first_tokens[len(first_tokens) // 2],
+            "ttft_p95": first_tokens[int(len(first_tokens) * 0.95)],
+            "total_p50": totals[len(totals) // 2],
+            "total_p95": totals[int(len(totals) * 0.95)],
+        }
+    return summary
+
+class Histogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+# Spans run on the event loop and in the worker pools, so updates are serialized
+stage_histograms = {}
+stage_errors = Counter()
+stage_lock = threading.Lock()
+
+@contextmanager
+def span(stage):
+    # Times one stage of handling an update into the stage's histogram
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        with stage_lock:
+            stage_errors[stage] += 1
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        with stage_lock:
+            if stage not in stage_histograms:
+                stage_histograms[stage] = Histogram()
+            stage_histograms[stage].observe(elapsed)
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def response_usage(response, prompt, text):
+    # Gemini reports exact counts in usage_metadata; the last chunk of a stream carries the totals
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None and getattr(usage, 'prompt_token_count', 0):
+        return usage.prompt_token_count, getattr(usage, 'candidates_token_count', 0) or 0, False
+    return estimate_tokens(prompt), estimate_tokens(text), True
+
+class TokenLedger:
+    # Tokens and cost of Gemini calls: totals per call type, recent calls, and the running bill of
+    # each user's current interview, which is folded into per-interview figures when the report is sent
+    def __init__(self, prices=GEMINI_PRICES, max_calls=TOKEN_LEDGER_CALLS, max_users=SESSION_MAX_COUNT):
+        self.prices = prices
+        self.max_users = max_users
+        self.calls = deque(maxlen=max_calls)  # (time, kind, users, input tokens, output tokens, cost)
+        self.kinds = {}  # kind -> [calls, input tokens, output tokens, cost]
+        self.estimated_calls = 0
+        self.interviews = OrderedDict()  # user_id -> [calls, input tokens, output tokens, cost], least recent first
+        self.interview_costs = Histogram(COST_BUCKETS)
+        self.interview_tokens = 0
+        self._lock = threading.Lock()
+    
+    def cost(self, input_tokens, output_tokens):
+        return (input_tokens * self.prices["input"] + output_tokens * self.prices["output"]) / 1_000_000
+    
+    def record(self, kind, input_tokens, output_tokens, users=(), estimated=False):
+        cost = self.cost(input_tokens, output_tokens)
+        users = [user_id for user_id in users if user_id is not None]
+        with self._lock:
+            self.calls.append((time.time(), kind, tuple(users), input_tokens, output_tokens, cost))
+            totals = self.kinds.setdefault(kind, [0, 0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += input_tokens
+            totals[2] += output_tokens
+            totals[3] += cost
+            self.estimated_calls += estimated
+            for user_id in users:
+                # A batched call is shared evenly between the interviews in it
+                bill = self.interviews.pop(user_id, None) or [0, 0, 0, 0.0]
+                bill[0] += 1
+                bill[1] += input_tokens / len(users)
+                bill[2] += output_tokens / len(users)
+                bill[3] += cost / len(users)
+                self.interviews[user_id] = bill
+            while len(self.interviews) > self.max_users:
+                self.interviews.popitem(last=False)
+        return cost
+    
+    def record_response(self, kind, prompt, response, text, users=()):
+        input_tokens, output_tokens, estimated = response_usage(response, prompt, text)
+        return self.record(kind, input_tokens, output_tokens, users, estimated)
+    
+    def start_interview(self, user_id):
+        with self._lock:
+            self.interviews.pop(user_id, None)
+    
+    def finish_interview(self, user_id):
+        with self._lock:
+            bill = self.interviews.pop(user_id, None)
+            if bill is None:
+                return None
+            self.interview_costs.observe(bill[3])
+            self.interview_tokens += round(bill[1] + bill[2])
+        return {"calls": bill[0], "input_tokens": round(bill[1]), "output_tokens": round(bill[2]), "cost": bill[3]}
+    
+    def interview_snapshot(self):
+        with self._lock:
+            histogram = Histogram(self.interview_costs.buckets)
+            histogram.counts = list(self.interview_costs.counts)
+            histogram.sum = self.interview_costs.sum
+            histogram.count = self.interview_costs.count
+            return histogram, self.interview_tokens
+    
+    def stats(self):
+        with self._lock:
+            return {
+                kind: {"calls": calls, "input_tokens": input_tokens, "output_tokens": output_tokens, "cost": cost}
+                for kind, (calls, input_tokens, output_tokens, cost) in self.kinds.items()
+            }
+
+token_ledger = TokenLedger()
+
+def render_metrics():
+    lines = [
+        "# HELP interview_bot_stage_seconds Time spent in each stage of handling an interview.",
+        "# TYPE interview_bot_stage_seconds histogram",
+    ]
+    with stage_lock:
+        for stage, histogram in sorted(stage_histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'interview_bot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'interview_bot_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'interview_bot_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines.append("# HELP interview_bot_stage_errors_total Stages that ended with an exception.")
+        lines.append("# TYPE interview_bot_stage_errors_total counter")
+        for stage, count in sorted(stage_errors.items()):
+            lines.append(f'interview_bot_stage_errors_total{{stage="{stage}"}} {count}')
+    
+    lines.append("# HELP interview_bot_llm_tokens_total Gemini tokens by call type; estimated when usage is missing.")
+    lines.append("# TYPE interview_bot_llm_tokens_total counter")
+    llm_usage = token_ledger.stats()
+    for kind, usage in sorted(llm_usage.items()):
+        lines.append(f'interview_bot_llm_tokens_total{{kind="{kind}",direction="input"}} {usage["input_tokens"]}')
+        lines.append(f'interview_bot_llm_tokens_total{{kind="{kind}",direction="output"}} {usage["output_tokens"]}')
+    lines.append("# TYPE interview_bot_llm_cost_usd_total counter")
+    lines.extend(f'interview_bot_llm_cost_usd_total{{kind="{kind}"}} {usage["cost"]}' for kind, usage in sorted(llm_usage.items()))
+    lines.append("# TYPE interview_bot_llm_calls_total counter")
+    lines.extend(f'interview_bot_llm_calls_total{{kind="{kind}"}} {usage["calls"]}' for kind, usage in sorted(llm_usage.items()))
+    lines.append("# TYPE interview_bot_llm_estimated_calls_total counter")
+    lines.append(f"interview_bot_llm_estimated_calls_total {token_ledger.estimated_calls}")
+    lines.append("# HELP interview_bot_interview_cost_usd Gemini cost of each finished interview.")
+    lines.append("# TYPE interview_bot_interview_cost_usd histogram")
+    histogram, interview_tokens = token_ledger.interview_snapshot()
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+        cumulative += count
+        lines.append(f'interview_bot_interview_cost_usd_bucket{{le="{bound}"}} {cumulative}')
+    lines.append(f"interview_bot_interview_cost_usd_sum {histogram.sum}")
+    lines.append(f"interview_bot_interview_cost_usd_count {histogram.count}")
+    lines.append("# TYPE interview_bot_interview_tokens_total counter")
+    lines.append(f"interview_bot_interview_tokens_total {interview_tokens}")
+    
+    components = {
+        "llm_scheduler": llm_scheduler.stats,
+        "chrome_pool": chrome_pool.stats,
+        "job_cache": job_cache.stats,
+        "question_cache": question_cache.stats,
+    }
+    for component, stats in components.items():
+        for key, value in stats().items():
+            name = f"interview_bot_{component}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            if isinstance(value, dict):
+                # Per-priority scheduler figures
+                lines.extend(f'{name}{{priority="{label}"}} {number}' for label, number in value.items())
+            else:
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+class SamplingProfiler:
+    # Samples every thread's stack from a background thread; output is in folded format
+    # ("thread;outer;inner count"), ready for flamegraph.pl or speedscope
+    def __init__(self, interval=PROFILER_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.running:
+            return
+        self.samples = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+        return self.folded()
+    
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+    
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+profiler = SamplingProfiler()
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    # Served from its own thread so it still answers when the event loop is stuck
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            body = render_metrics()
+        elif path == "/profile/start":
+            profiler.start()
+            body = "profiling\n"
+        elif path == "/profile/stop":
+            body = profiler.stop()
+        elif path == "/profile":
+            body = profiler.folded()
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=METRICS_PORT):
+    if port is None:
+        return None
+    server = http.server.ThreadingHTTPServer((METRICS_HOST, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"Metrics on http://{METRICS_HOST}:{port}/metrics")
+    return server
+
+def stop_metrics_server(server):
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    profiler.stop()
+
+async def call_model(prompt, kind, user_id=None, priority=PRIORITY_FEEDBACK, bill_to=None):
+    # One scheduled Gemini call, entered in the token ledger against bill_to (default: the user it is for)
+    # The model is looked up in the llm pool: the first lookup imports the Gemini client, which would stall the loop
+    response = await llm_scheduler.submit(lambda: get_gemini_model().generate_content(prompt), user_id=user_id, priority=priority)
+    token_ledger.record_response(kind, prompt, response, response.text, [user_id] if bill_to is None else bill_to)
+    return response
+
+async def stream_model_text(prompt, kind, user_id=None, priority=PRIORITY_FEEDBACK):
+    # Yields Gemini output chunks as they arrive; the blocking stream is consumed in the llm pool
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+    started = time.monotonic()
+    
+    def consume():
+        emitted = False
+        last_chunk = None
+        output = []
+        try:
+            for chunk in get_gemini_model().generate_content(prompt, stream=True):
+                last_chunk = chunk
+                text = chunk.text
+                if text:
+                    emitted = True
+                    output.append(text)
+                    loop.call_soon_threadsafe(chunks.put_nowait, text)
+        except Exception as e:
+            if emitted:
+                # Part of the answer is already on screen; retrying would repeat it
+                raise ResponseInterrupted(f"Response interrupted: {e}") from e
+            raise
+        token_ledger.record_response(kind, prompt, last_chunk, ''.join(output), [user_id])
+    
+    call = asyncio.ensure_future(llm_scheduler.submit(consume, user_id=user_id, priority=priority))
+    first_token = None
+    try:
+        while True:
+            getter = asyncio.ensure_future(chunks.get())
+            await asyncio.wait({getter, call}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                break
+            if first_token is None:
+                first_token = time.monotonic() - started
+            yield getter.result()
+        # Chunks queued before the call finished are still waiting
+        while not chunks.empty():
+            yield chunks.get_nowait()
+        call.result()
+    finally:
+        if not call.done():
+            call.cancel()
+    total = time.monotonic() - started
+    record_llm_latency(kind, first_token if first_token is not None else total, total)
+
+class StreamingMessage:
+    # A Telegram message that is sent on the first chunk and then edited as more text arrives
+    def __init__(self, reply_to, render):
+        self.reply_to = reply_to
+        self.render = render
+        self.message = None
+        self.shown = None
+        self.last_edit = 0.0
+    
+    async def update(self, text, final=False):
+        rendered = self.render(text)
+        if rendered == self.shown or not text.strip():
+            return
+        now = time.monotonic()
+        if self.message is None:
+            self.message = await self.reply_to.reply_text(rendered)
+        elif final or now - self.last_edit >= STREAM_EDIT_INTERVAL:
+            try:
+                await self.message.edit_text(rendered)
+            except RetryAfter as e:
+                if not final:
+                    return
+                await asyncio.sleep(e.retry_after)
+                await self.message.edit_text(rendered)
+            except BadRequest:
+                return  # e.g. "message is not modified"
+        else:
+            return
+        self.shown = rendered
+        self.last_edit = now
+
+class MemoryCacheBackend:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    blocking = True  # Called through run_store, so SQLite work stays off the event loop
+
+    def __init__(self, path, namespace, max_entries):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._touched = {}  # key -> last read, written with the next set() instead of on every hit
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, last_used)")
+        self._db.commit()
+
+    def get(self, key):
+        row = self._db.execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        # Reads since the last write update last_used here, so eviction still drops the least recently used
+        touched, self._touched = self._touched, {}
+        self._db.executemany(
+            "UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+            [(used, self.namespace, touched_key) for touched_key, used in touched.items()]
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), expires_at, time.time())
+        )
+        evicted = self._db.execute("""
+            DELETE FROM cache WHERE namespace = ? AND key IN (
+                SELECT key FROM cache WHERE namespace = ?
+                ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.namespace, self.namespace, self.max_entries)).rowcount
+        self._db.commit()
+        return evicted
+
+    def delete(self, key):
+        self._touched.pop(key, None)
+        self._db.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+def make_cache_backend(namespace, max_entries):
+    if CACHE_DB_PATH:
+        return SQLiteCacheBackend(CACHE_DB_PATH, namespace, max_entries)
+    return MemoryCacheBackend(max_entries)
+
+class TTLCache:
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "coalesced": 0}
+
+    @property
+    def blocking(self):
+        return getattr(self.backend, 'blocking', False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is not None and entry[1] < time.time():
+                self.backend.delete(key)
+                self.metrics["expired"] += 1
+                entry = None
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            self.metrics["hits"] += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            expires_at = time.time() + (self.ttl if ttl is None else ttl)
+            self.metrics["evictions"] += self.backend.set(key, value, expires_at)
+
+    def stats(self):
+        with self._lock:
+            return {**self.metrics, "size": len(self.backend)}
+
+def normalize_job_url(url):
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+job_cache = TTLCache(make_cache_backend("jobs", JOB_CACHE_MAX_ENTRIES), JOB_CACHE_TTL)
+pending_scrapes = {}
+
+async def get_job_details(url):
+    key = normalize_job_url(url)
+    job_data = await run_store(job_cache.get, key)
+    if job_data is not None:
+        return job_data
+
+    # Single-flight: concurrent submissions of the same posting share one scrape
+    task = pending_scrapes.get(key)
+    if task is None:
+        task = asyncio.create_task(_scrape_and_cache(key, url))
+        pending_scrapes[key] = task
+        task.add_done_callback(lambda _: pending_scrapes.pop(key, None))
+    else:
+        job_cache.metrics["coalesced"] += 1
+    return await asyncio.shield(task)
+
+async def _scrape_and_cache(key, url):
+    job_data = await fetch_job_details(url)
+    await run_store(job_cache.set, key, job_data)
+    return job_data
+
+# Domains that only render job content with JavaScript are remembered as "browser"
+fetch_strategies = TTLCache(make_cache_backend("fetch_strategies", 10000), FETCH_STRATEGY_TTL)
+http_client = None
+
+def get_http_client():
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"},
+            timeout=HTTP_FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS // 2)
+        )
+    return http_client
+
+async def close_http_client(app=None):
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+async def shutdown_services(app=None):
+    await llm_scheduler.close()
+    await close_http_client()
+
+async def fetch_job_details(url):
+    domain = urlsplit(url).hostname or ''
+    if await run_store(fetch_strategies.get, domain) != "browser":
+        # Try the cheap path first: many job boards render server-side
+        try:
+            with span("fetch_http"):
+                response = await get_http_client().get(url)
+                response.raise_for_status()
+            with span("parse"):
+                job_data = await run_blocking("parse", parse_job_page, response.text, url)
+        except Exception as e:
+            # A timeout, 429 or 5xx says nothing about how the domain renders, so only this request
+            # uses the browser
+            print(f"HTTP fetch of {url} failed, using the browser for this request: {e}")
+            return await run_blocking("browser", scrape_job_details, url)
+        try:
+            validate_job_details(job_data, strict=True)
+        except Exception as e:
+            print(f"Remembering that {domain} needs the browser: {e}")
+        else:
+            await run_store(fetch_strategies.set, domain, "http")
+            return job_data
+    
+    job_data = await run_blocking("browser", scrape_job_details, url)
+    await run_store(fetch_strategies.set, domain, "browser")
+    return job_data
 
 class UserSession:
+    __slots__ = ('job_data', 'questions', 'current_question', 'answers', 'last_active', 'questions_pending')
+    
     def __init__(self):
         self.job_data = None
         self.questions = []
         self.current_question = 0
         self.answers = []
+        self.last_active = time.time()
+        self.questions_pending = False  # More questions are still being generated
+    
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data):
+        session = cls()
+        for name in cls.__slots__:
+            if name in data:
+                setattr(session, name, data[name])
+        return session
+
+class UserLocks:
+    # One asyncio.Lock per user, dropped again once nobody holds or waits for it
+    def __init__(self):
+        self._locks = {}  # user_id -> [lock, holders and waiters]
+    
+    @asynccontextmanager
+    async def hold(self, user_id):
+        entry = self._locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[user_id]
+    
+    def __len__(self):
+        return len(self._locks)
+
+class InMemorySessionStore:
+    blocking = False
+    
+    def __init__(self, max_sessions=SESSION_MAX_COUNT, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()  # Least recently active first
+        self._locks = UserLocks()
+        self.metrics = {"evicted_idle": 0, "evicted_capacity": 0}
+    
+    def lock(self, user_id):
+        # Updates are handled concurrently; this keeps one user's read-modify-save sequences apart
+        return self._locks.hold(user_id)
+    
+    def get(self, user_id):
+        session = self._sessions.get(user_id)
+        if session is not None and time.time() - session.last_active > self.idle_timeout:
+            del self._sessions[user_id]
+            self.metrics["evicted_idle"] += 1
+            return None
+        return session
+    
+    def save(self, user_id, session):
+        session.last_active = time.time()
+        self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        self._evict()
+    
+    def delete(self, user_id):
+        self._sessions.pop(user_id, None)
+    
+    def _evict(self):
+        cutoff = time.time() - self.idle_timeout
+        while self._sessions:
+            user_id, oldest = next(iter(self._sessions.items()))
+            if oldest.last_active < cutoff:
+                self.metrics["evicted_idle"] += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.metrics["evicted_capacity"] += 1
+            else:
+                break
+            del self._sessions[user_id]
+    
+    def __len__(self):
+        return len(self._sessions)
+
+class SQLiteSessionStore:
+    blocking = True  # Called through run_store
+    
+    def __init__(self, path=SESSION_DB_PATH, max_sessions=SESSION_MAX_COUNT, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.metrics = {"evicted_idle": 0, "evicted_capacity": 0}
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()  # The connection is shared by the db pool's threads
+        # WAL lets several bot workers read while one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                user_id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL,
+                last_active REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS session_locks (
+                user_id INTEGER PRIMARY KEY,
+                owner INTEGER NOT NULL,
+                expires REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        self._saves = 0
+        self._locks = UserLocks()
+    
+    @asynccontextmanager
+    async def lock(self, user_id):
+        # Handlers of one user's updates may run in different workers: within a worker they queue
+        # on an asyncio.Lock, and the worker that gets through then takes a lease row in the shared database
+        async with self._locks.hold(user_id):
+            delay = 0.01
+            while not await run_blocking("db", self._take_lease, user_id):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+            try:
+                yield
+            finally:
+                await run_blocking("db", self._release_lease, user_id)
+    
+    def _take_lease(self, user_id):
+        now = time.time()
+        with self._lock:
+            # A lease left behind by a crashed worker expires instead of locking the user out
+            self._db.execute("DELETE FROM session_locks WHERE user_id = ? AND expires < ?", (user_id, now))
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO session_locks (user_id, owner, expires) VALUES (?, ?, ?)",
+                (user_id, os.getpid(), now + SESSION_LOCK_TTL)
+            )
+            self._db.commit()
+            return cursor.rowcount == 1
+    
+    def _release_lease(self, user_id):
+        with self._lock:
+            self._db.execute("DELETE FROM session_locks WHERE user_id = ? AND owner = ?", (user_id, os.getpid()))
+            self._db.commit()
+    
+    def get(self, user_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, last_active FROM sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.idle_timeout:
+                self.delete(user_id)
+                self.metrics["evicted_idle"] += 1
+                return None
+        return UserSession.from_dict(json.loads(row[0]))
+    
+    def save(self, user_id, session):
+        session.last_active = time.time()
+        data = json.dumps(session.to_dict())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, data, last_active) VALUES (?, ?, ?)",
+                (user_id, data, session.last_active)
+            )
+            self._db.commit()
+            # Sweeping scans the index, so only do it every so often
+            self._saves += 1
+            if self._saves % 100 == 0:
+                self._evict()
+    
+    def delete(self, user_id):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            self._db.commit()
+    
+    def _evict(self):
+        cursor = self._db.execute(
+            "DELETE FROM sessions WHERE last_active < ?", (time.time() - self.idle_timeout,)
+        )
+        self.metrics["evicted_idle"] += cursor.rowcount
+        cursor = self._db.execute("""
+            DELETE FROM sessions WHERE user_id IN (
+                SELECT user_id FROM sessions ORDER BY last_active DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_sessions,))
+        self.metrics["evicted_capacity"] += cursor.rowcount
+        self._db.commit()
+    
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+def make_session_store():
+    if SESSION_STORE == "sqlite":
+        return SQLiteSessionStore()
+    return InMemorySessionStore()
+
+session_store = make_session_store()
+
+class InMemoryUpdateLog:
+    blocking = False
+    
+    def __init__(self, ttl=UPDATE_DEDUP_TTL):
+        self.ttl = ttl
+        self._seen = OrderedDict()  # update_id -> first seen, oldest first
+    
+    def claim(self, update_id):
+        # True the first time an update arrives; redeliveries of it return False
+        now = time.time()
+        while self._seen and now - next(iter(self._seen.values())) > self.ttl:
+            self._seen.popitem(last=False)
+        if update_id in self._seen:
+            return False
+        self._seen[update_id] = now
+        return True
+    
+    def __len__(self):
+        return len(self._seen)
+
+class SQLiteUpdateLog:
+    blocking = True  # Called through run_store
+    
+    def __init__(self, path=SESSION_DB_PATH, ttl=UPDATE_DEDUP_TTL):
+        self.ttl = ttl
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS processed_updates (
+                update_id INTEGER PRIMARY KEY,
+                seen_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS processed_updates_seen_at ON processed_updates (seen_at)")
+        self._db.commit()
+        self._lock = threading.Lock()  # The connection is shared by the db pool's threads
+        self._claims = 0
+    
+    def claim(self, update_id):
+        # The primary key makes the claim atomic across every worker sharing the database
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO processed_updates (update_id, seen_at) VALUES (?, ?)",
+                (update_id, time.time())
+            )
+            self._db.commit()
+            self._claims += 1
+            if self._claims % 1000 == 0:
+                self._db.execute("DELETE FROM processed_updates WHERE seen_at < ?", (time.time() - self.ttl,))
+                self._db.commit()
+            return cursor.rowcount == 1
+    
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM processed_updates").fetchone()[0]
+
+def make_update_log():
+    if SESSION_STORE == "sqlite" or WEBHOOK_WORKERS > 1:
+        return SQLiteUpdateLog()
+    return InMemoryUpdateLog()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
-    user_sessions[user_id] = UserSession()
+    async with session_store.lock(user_id):
+        await run_store(session_store.save, user_id, UserSession())
+    report_drafts.pop(user_id, None)
     await update.message.reply_text(
         "🚀 Welcome to Interview Prep Bot!\n"
         "Send me a job listing URL (LinkedIn, Indeed, etc.) to begin."
@@ -47,8 +1299,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
-    if user_id not in user_sessions:
-        user_sessions[user_id] = UserSession()
+    async with session_store.lock(user_id):
+        if await run_store(session_store.get, user_id) is None:
+            await run_store(session_store.save, user_id, UserSession())
 
     if update.message.text and ("http://" in update.message.text or "https://" in update.message.text):
         await handle_job_url(update, context)
@@ -59,11 +1312,18 @@ async def handle_job_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
     url = update.message.text
     
-    await update.message.reply_text("🔍 Analyzing the job posting...")
-    
     try:
-        job_data = scrape_job_details(url)
-        user_sessions[user_id].job_data = job_data
+        # Postings loaded by `bot.py ingest` start straight away, without scraping or Gemini
+        banked = await lookup_question_bank(url)
+        if banked is None:
+            await update.message.reply_text("🔍 Analyzing the job posting...")
+        
+        job_data = banked["job"] if banked else await get_job_details(url)
+        async with session_store.lock(user_id):
+            session = await run_store(session_store.get, user_id) or UserSession()
+            session.job_data = job_data
+            await run_store(session_store.save, user_id, session)
+        token_ledger.start_interview(user_id)
         
         # Format requirements and responsibilities more cleanly
         requirements = job_data['requirements'][:3] if job_data['requirements'] else []
@@ -72,6 +1332,12 @@ async def handle_job_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Remove any items that are too short or look like placeholders
         requirements = [r for r in requirements if len(r) > 30 and 'job' not in r.lower()[:10]]
         responsibilities = [r for r in responsibilities if len(r) > 30 and 'job' not in r.lower()[:10]]
+        has_details = requirements or responsibilities or job_data['description']
+        
+        # Questions only depend on the parsed posting, so have Gemini write them while the summary goes out
+        questions_task = None
+        if has_details and PREFETCH_QUESTIONS and not LLM_STREAMING and banked is None:
+            questions_task = asyncio.create_task(generate_questions(job_data, user_id))
         
         # Create an elegant job summary with better spacing and formatting
         job_summary = f"""✨ Position Overview
@@ -106,158 +1372,618 @@ async def handle_job_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         job_summary += "\n\n🎯 Next Steps\nI'll generate targeted interview questions based on this role. Get ready to practice!"
         
-        await update.message.reply_text(job_summary)
+        try:
+            await update.message.reply_text(job_summary)
+        except Exception:
+            if questions_task is not None:
+                questions_task.cancel()
+            raise
         
-        if requirements or responsibilities or job_data['description']:
-            questions = generate_questions(job_data)
-            user_sessions[user_id].questions = questions
-            user_sessions[user_id].current_question = 0
-            await ask_question(update, context)
+        if has_details:
+            if banked:
+                questions = list(random.choice(banked["question_sets"]))
+            elif LLM_STREAMING:
+                await start_streamed_questions(update, context, user_id, job_data)
+                return
+            else:
+                questions = await (questions_task or generate_questions(job_data, user_id))
+            async with session_store.lock(user_id):
+                session = await run_store(session_store.get, user_id) or session
+                session.job_data = job_data
+                session.questions = questions
+                session.current_question = 0
+                await run_store(session_store.save, user_id, session)
+                await ask_question(update, context)
+            await schedule_rubrics(job_data, questions, user_id)
         else:
             await update.message.reply_text("❌ I couldn't find enough details in this job posting. Please try with a different job URL that contains more information.")
         
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
-def scrape_job_details(url):
+def create_chrome_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--start-maximized")
-    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
+    options.add_argument(f"--user-agent={USER_AGENT}")
     options.add_argument("--disable-blink-features=AutomationControlled")  # Avoid detection
+    return webdriver.Chrome(options=options)
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.base_window = None  # The browser's own window, kept on about:blank between leases
+        self.context_id = None  # The current lease's CDP browser context
+
+class ChromeDriverPool:
+    def __init__(self, max_size=CHROME_POOL_SIZE, max_pages=CHROME_MAX_PAGES_PER_DRIVER,
+                 lease_timeout=CHROME_LEASE_TIMEOUT, driver_factory=create_chrome_driver):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.lease_timeout = lease_timeout
+        self.driver_factory = driver_factory
+        self._idle = []
+        self._active = 0
+        self._lock = threading.Condition()
+        self._closed = False
+        self.metrics = {
+            "leases": 0,
+            "created": 0,
+            "recycled": 0,  # Page limit reached
+            "crashed": 0,
+            "reset_failures": 0,
+            "lease_wait_total": 0.0,
+            "lease_wait_max": 0.0,
+        }
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.lease_timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise Exception("Browser pool is shut down")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._active + len(self._idle) < self.max_size:
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception("Timed out waiting for a free browser")
+                self._lock.wait(remaining)
+            self._active += 1
+            waited = time.monotonic() - started
+            self.metrics["leases"] += 1
+            self.metrics["lease_wait_total"] += waited
+            self.metrics["lease_wait_max"] = max(self.metrics["lease_wait_max"], waited)
+
+        # Start browsers outside the lock so a slow cold start doesn't block other leases
+        if pooled is None:
+            try:
+                pooled = PooledDriver(self.driver_factory())
+            except Exception:
+                with self._lock:
+                    self._active -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self.metrics["created"] += 1
+        try:
+            self._open_context(pooled)
+        except Exception as e:
+            print(f"Could not open a browser context, discarding the browser: {e}")
+            self.release(pooled, broken=True)
+            raise
+        return pooled
+
+    def release(self, pooled, broken=False):
+        pooled.pages += 1
+        if broken:
+            retired = "crashed"
+        elif pooled.pages >= self.max_pages:
+            retired = "recycled"
+        elif not self._reset(pooled):
+            retired = "reset_failures"
+        else:
+            retired = None
+
+        if retired:
+            self._quit(pooled.driver)
+        with self._lock:
+            self._active -= 1
+            if retired:
+                self.metrics[retired] += 1
+            elif self._closed:
+                self._quit(pooled.driver)
+            else:
+                self._idle.append(pooled)
+            self._lock.notify()
+
+    @contextmanager
+    def lease(self):
+        from selenium.common.exceptions import WebDriverException
+        
+        pooled = self.acquire()
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            # A dead session means the browser crashed; don't hand it out again
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def _open_context(self, pooled):
+        # Each lease browses in a fresh incognito-like browser context, so cookies, storage and cache
+        # from every origin it touches (redirect targets and third parties included) go away with it
+        driver = pooled.driver
+        if pooled.base_window is None:
+            pooled.base_window = driver.current_window_handle
+        pooled.context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+        target_id = driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": pooled.context_id}
+        )["targetId"]
+        # ChromeDriver names windows after their DevTools target
+        window = next((handle for handle in driver.window_handles if handle.endswith(target_id)), None)
+        if window is None:
+            raise Exception(f"No window for browser target {target_id}")
+        driver.switch_to.window(window)
+
+    def _reset(self, pooled):
+        try:
+            pooled.driver.switch_to.window(pooled.base_window)
+            pooled.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": pooled.context_id})
+            pooled.context_id = None
+            return True
+        except Exception as e:
+            print(f"Could not reset a browser, recycling it: {e}")
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            leases = self.metrics["leases"]
+            return {
+                "active": self._active,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "leases": leases,
+                "created": self.metrics["created"],
+                "recycled": self.metrics["recycled"],
+                "crashed": self.metrics["crashed"],
+                "reset_failures": self.metrics["reset_failures"],
+                "lease_wait_avg": self.metrics["lease_wait_total"] / leases if leases else 0.0,
+                "lease_wait_max": self.metrics["lease_wait_max"],
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+        for pooled in idle:
+            self._quit(pooled.driver)
+
+chrome_pool = ChromeDriverPool()
+
+def scrape_job_details(url):
+    try:
+        with span("fetch_browser"), chrome_pool.lease() as driver:
+            driver.get(url)
+            wait_for_job_content(driver)
+
+            # Get the page source after JavaScript execution
+            page_source = driver.page_source
+    except Exception as e:
+        raise Exception(f"Error scraping job details: {str(e)}")
+
+    try:
+        with span("parse"):
+            job_details = parse_job_page(page_source, url)
+        validate_job_details(job_details)
+        return job_details
+        
+    except Exception as e:
+        raise Exception(f"Error scraping job details: {str(e)}")
+
+def wait_for_job_content(driver):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    
+    # Wait until the page has loaded and rendered a title plus something that looks like job content
+    def content_ready(driver):
+        return (
+            driver.execute_script("return document.readyState") == "complete"
+            and driver.find_elements(By.CSS_SELECTOR, "h1, [class*='title']")
+            and driver.find_elements(By.CSS_SELECTOR, BROWSER_CONTENT_SELECTORS)
+        )
+    
+    try:
+        WebDriverWait(driver, BROWSER_WAIT_TIMEOUT).until(content_ready)
+    except TimeoutException:
+        pass  # Parse whatever rendered; validation decides if it's enough
+
+def validate_job_details(job_details, strict=False):
+    # Ensure we have some content
+    if not job_details["title"]:
+        raise Exception("Could not find job title")
     
-    driver = webdriver.Chrome(options=options)
-    wait = WebDriverWait(driver, 15)  # Increased wait time
+    if not any([job_details["requirements"], job_details["responsibilities"], job_details["description"]]):
+        raise Exception("Could not find job details")
+    
+    # A plain HTTP fetch of a JavaScript-rendered board still has a <title> and footer text,
+    # so only a heading title and sectioned content show the page didn't need rendering
+    if strict and job_details.get("fallbacks"):
+        raise Exception(f"Job details came from fallbacks: {', '.join(job_details['fallbacks'])}")
+
+def clean_text(text):
+    return ' '.join(text.strip().split())
+
+def classify_text(text):
+    # Groups in the order their first keyword appears, so "Responsibilities & Skills" leads with responsibilities
+    positions = {}
+    for group, keywords in SECTION_KEYWORDS.items():
+        hits = [text.find(keyword) for keyword in keywords if keyword in text]
+        if hits:
+            positions[group] = min(hits)
+    return sorted(positions, key=positions.get)
+
+def make_soup(html):
+    from bs4 import BeautifulSoup, FeatureNotFound
     
     try:
-        driver.get(url)
-        time.sleep(5)  # Increased wait time for dynamic content
-        
-        # Get the page source after JavaScript execution
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # Initialize job details
-        job_details = {
-            "title": "",
-            "url": url,
-            "responsibilities": [],
-            "requirements": [],
-            "experience_level": "",
-            "description": ""
-        }
+        return BeautifulSoup(html, PARSER_BACKEND)
+    except FeatureNotFound:
+        return BeautifulSoup(html, 'html.parser')
+
+def parse_job_page(html, url):
+    from bs4 import NavigableString, Tag
+    
+    soup = make_soup(html)
+    
+    # Initialize job details
+    job_details = {
+        "title": "",
+        "url": url,
+        "responsibilities": [],
+        "requirements": [],
+        "experience_level": "",
+        "description": "",
+        "fallbacks": []  # Weaker sources the details came from, e.g. "title_tag"
+    }
+    
+    # Extract title using multiple methods
+    title_tag = soup.find('title')
+    page_title = title_tag.get_text(strip=True).lower() if title_tag else ''
+    possible_title_elements = (
+        soup.find('h1') or 
+        soup.find(class_=lambda x: x and ('job-title' in x.lower() or 'jobtitle' in x.lower())) or
+        # A rendered heading repeating the document title, e.g. <h2>Data Analyst</h2> under "Acme - Data Analyst"
+        soup.find(['h2', 'h3'], string=lambda x: x and len(x.strip()) > 3 and x.strip().lower() in page_title) or
+        title_tag or
+        soup.find(['h1', 'h2'], string=lambda x: x and ('job' in x.lower() or 'position' in x.lower()))
+    )
+    
+    if possible_title_elements:
+        job_details["title"] = possible_title_elements.get_text(strip=True)
+        if possible_title_elements.name == 'title':
+            # Every page has a <title>, including an unrendered app shell
+            job_details["fallbacks"].append("title_tag")
+    
+    # Walk the DOM once in document order. Every text node is appended to `texts` exactly once, so
+    # an element's text is the slice texts[start:end] and is never re-extracted from its subtree.
+    texts = []
+    found = {"requirements": {}, "responsibilities": {}}  # Dicts keep first-seen order and drop duplicates
+    descriptions = []
+    heading_group = None  # Group announced by the most recent heading, e.g. "Requirements"
+    heading_text = None
+    heading_scope = None  # Stack depth of the container the heading lives in
+    
+    root = soup.find('body') or soup
+    # Stack entries: element, child iterator, first text index, groups named by id/class,
+    # groups mentioned in the subtree text, and whether a descendant already took the description
+    stack = [(root, iter(root.children), 0, set(), set(), [False])]
+    while stack:
+        node, children, text_start, named, mentioned, described = stack[-1]
+        child = next(children, None)
+        if child is not None:
+            if isinstance(child, Tag):
+                if child.name not in SKIPPED_TAGS:
+                    child_named = set()
+                    if child.name in ('div', 'section'):
+                        attributes = (child.get('id') or '') + ' ' + ' '.join(child.get('class') or [])
+                        child_named = classify_text(attributes.lower())
+                    stack.append((child, iter(child.children), len(texts), child_named, set(), [False]))
+            elif type(child) is NavigableString:
+                text = clean_text(child)
+                if not text:
+                    continue
+                texts.append(text)
+                lowered = text.lower()
+                groups = classify_text(lowered)
+                mentioned.update(groups)
+                if len(text) <= HEADING_MAX_LENGTH:
+                    item_groups = [group for group in groups if group in found]
+                    if item_groups or node.name in HEADING_TAGS:
+                        heading_group = item_groups[0] if item_groups else None
+                        heading_text = text
+                        heading_scope = max(
+                            (depth for depth, entry in enumerate(stack) if entry[0].name in CONTAINER_TAGS),
+                            default=0
+                        )
+                if not job_details["experience_level"] and 'experience' in lowered:
+                    match = EXPERIENCE_PATTERN.search(lowered)
+                    if match:
+                        job_details["experience_level"] = match.group(1)
+            continue
         
-        # Extract title using multiple methods
-        possible_title_elements = (
-            soup.find('h1') or 
-            soup.find(class_=lambda x: x and ('job-title' in x.lower() or 'jobtitle' in x.lower())) or
-            soup.find('title') or
-            soup.find(['h1', 'h2'], string=lambda x: x and ('job' in x.lower() or 'position' in x.lower()))
-        )
+        stack.pop()
+        if len(stack) == heading_scope:
+            # Leaving the heading's container ends its section
+            heading_group = heading_text = heading_scope = None
         
-        if possible_title_elements:
-            job_details["title"] = possible_title_elements.get_text(strip=True)
-        
-        # Look for job description and requirements in common patterns
-        description_keywords = ['job-description', 'description', 'job-details', 'about-job', 'job-summary']
-        requirement_keywords = ['requirements', 'qualifications', 'skills', 'what-we-need']
-        responsibility_keywords = ['responsibilities', 'duties', 'what-you-will-do', 'day-to-day']
-        
-        # Function to clean text
-        def clean_text(text):
-            return ' '.join(text.strip().split())
-        
-        # Extract content by sections
-        for section in soup.find_all(['div', 'section']):
-            section_text = section.get_text(' ', strip=True).lower()
-            section_id = section.get('id', '').lower()
-            section_class = ' '.join(section.get('class', [])).lower()
-            
-            # Check if section contains relevant content
-            if any(keyword in section_id or keyword in section_class or keyword in section_text 
-                  for keyword in description_keywords):
-                job_details["description"] = clean_text(section.get_text())
-            
-            if any(keyword in section_id or keyword in section_class or keyword in section_text 
-                  for keyword in requirement_keywords):
-                # Look for bullet points or numbered lists
-                requirements = []
-                for item in section.find_all(['li', 'p']):
-                    text = clean_text(item.get_text())
-                    if len(text) > 20:  # Avoid very short items
-                        requirements.append(text)
-                if requirements:
-                    job_details["requirements"].extend(requirements)
-            
-            if any(keyword in section_id or keyword in section_class or keyword in section_text 
-                  for keyword in responsibility_keywords):
-                responsibilities = []
-                for item in section.find_all(['li', 'p']):
-                    text = clean_text(item.get_text())
-                    if len(text) > 20:  # Avoid very short items
-                        responsibilities.append(text)
-                if responsibilities:
-                    job_details["responsibilities"].extend(responsibilities)
-            
-            # Look for experience requirements
-            if 'experience' in section_text:
-                import re
-                experience_pattern = r'\b(\d+[-\s]?(?:\d+)?\+?\s*(?:year|yr)s?)\b'
-                experience_matches = re.findall(experience_pattern, section_text)
-                if experience_matches:
-                    job_details["experience_level"] = experience_matches[0]
-        
-        # If no structured data found, try to extract from general content
-        if not any([job_details["requirements"], job_details["responsibilities"], job_details["description"]]):
-            # Get all text content
-            main_content = soup.find(['main', 'article']) or soup.find('body')
-            if main_content:
-                content_text = main_content.get_text(' ', strip=True)
-                # Split into paragraphs and analyze each
-                paragraphs = [p for p in content_text.split('\n') if len(p.strip()) > 50]
-                for para in paragraphs:
-                    para_lower = para.lower()
-                    if any(keyword in para_lower for keyword in requirement_keywords):
-                        job_details["requirements"].append(clean_text(para))
-                    elif any(keyword in para_lower for keyword in responsibility_keywords):
-                        job_details["responsibilities"].append(clean_text(para))
-                    else:
-                        job_details["description"] = clean_text(para)
-        
-        # Ensure we have some content
-        if not job_details["title"]:
-            raise Exception("Could not find job title")
-        
-        if not any([job_details["requirements"], job_details["responsibilities"], job_details["description"]]):
-            raise Exception("Could not find job details")
+        if node.name in ('li', 'p'):
+            text = ' '.join(texts[text_start:])
+            if len(text) > 20 and text != heading_text:  # Avoid very short items and the headings themselves
+                # A container named after a group wins over the surrounding heading
+                groups = next((entry[3] & found.keys() for entry in reversed(stack) if entry[3] & found.keys()), None)
+                for group in groups or ([heading_group] if heading_group else []):
+                    found[group].setdefault(text, None)
         
-        return job_details
+        if node.name in ('div', 'section') and not described[0]:
+            # The innermost section named or headed as a description becomes the description
+            if 'description' in named or ('description' in mentioned and len(texts) - text_start > 1):
+                descriptions.append((text_start, len(texts)))
+                described[0] = True
         
-    except Exception as e:
-        raise Exception(f"Error scraping job details: {str(e)}")
-    finally:
-        driver.quit()
+        if stack:
+            parent = stack[-1]
+            parent[4].update(mentioned)
+            parent[5][0] = parent[5][0] or described[0]
+    
+    job_details["requirements"] = list(found["requirements"])
+    job_details["responsibilities"] = list(found["responsibilities"])
+    if descriptions:
+        first, last = descriptions[0]
+        job_details["description"] = ' '.join(texts[first:last])
+    
+    # If no structured data found, classify the longer text blocks individually
+    if not any([job_details["requirements"], job_details["responsibilities"], job_details["description"]]):
+        job_details["fallbacks"].append("text_blocks")
+        for para in texts:
+            if len(para) <= 50:
+                continue
+            para_lower = para.lower()
+            if any(keyword in para_lower for keyword in SECTION_KEYWORDS['requirements']):
+                job_details["requirements"].append(para)
+            elif any(keyword in para_lower for keyword in SECTION_KEYWORDS['responsibilities']):
+                job_details["responsibilities"].append(para)
+            else:
+                job_details["description"] = para
+    
+    return job_details
+
+question_cache = TTLCache(make_cache_backend("questions", QUESTION_CACHE_MAX_ENTRIES), QUESTION_CACHE_TTL)
+
+# Rubrics are keyed by role and question, so a cached question set comes with its rubrics
+rubric_cache = TTLCache(make_cache_backend("rubrics", RUBRIC_CACHE_MAX_ENTRIES), RUBRIC_CACHE_TTL)
+pending_rubrics = {}
+
+class QuestionBank:
+    # Preloaded postings and their question sets, one zlib-compressed JSON row per normalized URL
+    def __init__(self, path=QUESTION_BANK_PATH):
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                url TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                ingested_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS failures (
+                url TEXT PRIMARY KEY,
+                error TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                failed_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._db.commit()
+        self._lock = threading.Lock()  # Lookups share the connection across the db pool's threads
+    
+    def get(self, url):
+        key = normalize_job_url(url)
+        with self._lock:
+            row = self._db.execute("SELECT data FROM postings WHERE url = ?", (key,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+    
+    def put(self, url, job_data, question_sets, rubrics):
+        entry = {"job": job_data, "question_sets": question_sets, "rubrics": rubrics}
+        key = normalize_job_url(url)
+        self._db.execute(
+            "INSERT OR REPLACE INTO postings (url, data, ingested_at) VALUES (?, ?, ?)",
+            (key, zlib.compress(json.dumps(entry, separators=(',', ':')).encode('utf-8'), 9), time.time())
+        )
+        self._db.execute("DELETE FROM failures WHERE url = ?", (key,))
+        self._db.commit()
+    
+    def record_failure(self, url, error):
+        self._db.execute("""
+            INSERT INTO failures (url, error, attempts, failed_at) VALUES (?, ?, 1, ?)
+            ON CONFLICT (url) DO UPDATE SET error = excluded.error, attempts = attempts + 1, failed_at = excluded.failed_at
+        """, (normalize_job_url(url), str(error)[:500], time.time()))
+        self._db.commit()
+    
+    def ingested_urls(self):
+        return {row[0] for row in self._db.execute("SELECT url FROM postings")}
+    
+    def stats(self):
+        postings, data_bytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM postings").fetchone()
+        failures = self._db.execute("SELECT COUNT(*) FROM failures").fetchone()[0]
+        return {"postings": postings, "failures": failures, "data_bytes": data_bytes}
+    
+    def close(self):
+        self._db.close()
+
+question_bank = None
+
+def get_question_bank():
+    # Opened once ingestion has created the file, so a bot that never ingests doesn't create one
+    global question_bank
+    if question_bank is None and QUESTION_BANK_PATH and os.path.exists(QUESTION_BANK_PATH):
+        with lazy_init_lock:
+            if question_bank is None:
+                question_bank = QuestionBank(QUESTION_BANK_PATH)
+    return question_bank
+
+def read_question_bank(url):
+    bank = get_question_bank()
+    return bank.get(url) if bank else None
+
+async def lookup_question_bank(url):
+    # SQLite and zlib work, so off the event loop; a broken bank only costs the shortcut
+    try:
+        entry = await run_blocking("db", read_question_bank, url)
+    except (sqlite3.Error, zlib.error) as e:
+        print(f"Question bank lookup failed, handling {url} live: {e}")
+        return None
+    if entry is None or not entry["question_sets"]:
+        return None
+    for question, rubric in entry["rubrics"].items():
+        await run_store(rubric_cache.set, rubric_key(entry["job"]['title'], question), rubric)
+    return entry
 
-def generate_questions(job_data):
-    # Prepare detailed context for question generation
+def fit_to_budget(text, tokens):
+    # Cuts text to roughly `tokens` tokens, at a word boundary
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + ' …'
+
+def text_fingerprint(text):
+    return ' '.join(re.findall(r'[a-z0-9+#]+', text.lower()))
+
+def description_sentences(description, items):
+    # The description is often a page-level block that repeats the listed items and section headings;
+    # cut those out and keep the remaining sentences once each
+    if items:
+        pattern = '|'.join(re.escape(item) for item in sorted(items, key=len, reverse=True))
+        fragments = re.split(pattern, description)
+    else:
+        fragments = [description]
+    sentences = []
+    for fragment in fragments:
+        for sentence in re.split(r'(?<=[.!?])\s+', fragment.strip()):
+            lowered = sentence.lower()
+            if len(sentence.split()) < 4 or (len(sentence) <= HEADING_MAX_LENGTH and classify_text(lowered)):
+                continue  # Leftover headings and fragments like "Show more"
+            sentences.append(sentence)
+    return sentences
+
+def relevance_score(text, title_words):
+    # Higher for text about this role's work and skills, lower for boilerplate
+    lowered = text.lower()
+    words = set(text_fingerprint(text).split())
+    score = 2 * len(words & title_words)
+    score += min(3, len(re.findall(r'(?<=\s)[A-Z][A-Za-z0-9+#.]+', text)))  # Named tools and skills
+    if EXPERIENCE_PATTERN.search(lowered):
+        score += 1
+    if any(keyword in lowered for keyword in BOILERPLATE_KEYWORDS):
+        score -= 5
+    return score
+
+def build_question_context(job_data, budget=None):
+    # Deduplicated job text, most relevant first, within the question prompt's token budget. Listed
+    # responsibilities and requirements outrank description sentences; the result keeps page order.
+    budget = PROMPT_TOKEN_BUDGETS["questions"] if budget is None else budget
+    title_words = set(text_fingerprint(job_data['title']).split())
+    seen = []
+    candidates = []
+    for section in ('responsibilities', 'requirements', 'description'):
+        if section == 'description':
+            texts = description_sentences(job_data['description'], job_data['responsibilities'] + job_data['requirements'])
+            bonus = 0
+        else:
+            texts = job_data[section]
+            bonus = 3
+        for position, text in enumerate(texts):
+            # Repeats often differ only by a leftover heading, so text inside kept text counts as seen
+            fingerprint = text_fingerprint(text)
+            if not fingerprint or any(fingerprint in other or other in fingerprint for other in seen):
+                continue
+            seen.append(fingerprint)
+            score = relevance_score(text, title_words) + bonus
+            if score < 0:
+                continue  # Boilerplate
+            text = fit_to_budget(text, budget // 4)  # No single line crowds out the rest
+            candidates.append((-score, len(candidates), section, position, text))
+    
+    remaining = budget - estimate_tokens(job_data['title'] + job_data['experience_level'])
+    chosen = {'responsibilities': [], 'requirements': [], 'description': []}
+    for _, _, section, position, text in sorted(candidates):
+        cost = estimate_tokens(text) + 1
+        if cost <= remaining:
+            remaining -= cost
+            chosen[section].append((position, text))
+    responsibilities, requirements, description = ([text for _, text in sorted(chosen[section])] for section in chosen)
+    
     context = f"""
     Job Title: {job_data['title']}
     
     Key Responsibilities:
-    {chr(10).join(f'- {r}' for r in job_data['responsibilities'][:5]) if job_data['responsibilities'] else 'Not specified'}
+    {chr(10).join(f'- {r}' for r in responsibilities) if responsibilities else 'Not specified'}
     
     Requirements/Qualifications:
-    {chr(10).join(f'- {r}' for r in job_data['requirements'][:5]) if job_data['requirements'] else 'Not specified'}
+    {chr(10).join(f'- {r}' for r in requirements) if requirements else 'Not specified'}
     
     Experience Level: {job_data['experience_level'] if job_data['experience_level'] else 'Not specified'}
     """
     
-    if job_data['description']:
-        context += f"\nAdditional Context:\n{job_data['description'][:1000]}"
+    if description:
+        context += f"\nAdditional Context:\n{' '.join(description)}"
     
-    prompt = f"""
+    return context
+
+async def generate_questions(job_data, user_id=None, on_question=None):
+    context = build_question_context(job_data)
+    
+    # Identical postings produce identical contexts, so hash it to share question sets
+    key = hashlib.sha256(context.encode('utf-8')).hexdigest()
+    variants = await run_store(question_cache.get, key) or []
+    if len(variants) >= QUESTION_CACHE_VARIANTS:
+        questions = list(random.choice(variants))
+        if on_question:
+            for question in questions:
+                await on_question(question)
+        return questions
+    
+    with span("questions"):
+        if on_question:
+            questions = await stream_questions(context, user_id, on_question)
+        else:
+            questions = await request_questions(context, user_id)
+    if questions:
+        await run_store(question_cache.set, key, variants + [questions])
+    return questions
+
+def build_questions_prompt(context):
+    return f"""
     Generate 5 targeted interview questions for this role:
     {context}
     
@@ -268,19 +1994,82 @@ def generate_questions(job_data):
     - Questions should be specific to this role, not generic
     - Format as a numbered list
     """
-    
-    response = gemini_model.generate_content(prompt)
+
+async def request_questions(context, user_id=None):
+    started = time.monotonic()
+    prompt = build_questions_prompt(context)
+    response = await call_model(prompt, "questions", user_id, PRIORITY_QUESTIONS)
+    elapsed = time.monotonic() - started
+    record_llm_latency("questions", elapsed, elapsed)
     questions = [q for q in response.text.split('\n') if q.strip() and q[0].isdigit()]
-    return questions[:5]
+    return questions[:QUESTION_COUNT]
+
+async def stream_questions(context, user_id, on_question):
+    # Hands each numbered line to on_question as soon as the line is complete
+    prompt = build_questions_prompt(context)
+    questions = []
+    buffer = ''
+    async for chunk in stream_model_text(prompt, "questions", user_id, PRIORITY_QUESTIONS):
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for q in lines:
+            if q.strip() and q[0].isdigit() and len(questions) < QUESTION_COUNT:
+                questions.append(q)
+                await on_question(q)
+    if buffer.strip() and buffer[0].isdigit() and len(questions) < QUESTION_COUNT:
+        questions.append(buffer)
+        await on_question(buffer)
+    return questions
+
+async def start_streamed_questions(update, context, user_id, job_data):
+    async with session_store.lock(user_id):
+        session = await run_store(session_store.get, user_id)
+        session.questions = []
+        session.current_question = 0
+        session.questions_pending = True
+        await run_store(session_store.save, user_id, session)
+    
+    async def on_question(question):
+        # Reload under the lock: the user may already be answering earlier questions in another handler
+        async with session_store.lock(user_id):
+            session = await run_store(session_store.get, user_id)
+            if session is None:
+                return
+            session.questions.append(question)
+            await run_store(session_store.save, user_id, session)
+            if session.current_question == len(session.questions) - 1:
+                await ask_question(update, context)
+    
+    try:
+        await generate_questions(job_data, user_id, on_question)
+    finally:
+        async with session_store.lock(user_id):
+            session = await run_store(session_store.get, user_id)
+            if session is not None:
+                session.questions_pending = False
+                await run_store(session_store.save, user_id, session)
+    
+    if session is None:
+        return
+    await schedule_rubrics(job_data, session.questions, user_id)
+    if not session.questions:
+        await update.message.reply_text("❌ I couldn't generate interview questions for this posting. Please try again.")
+        return
+    async with session_store.lock(user_id):
+        session = await run_store(session_store.get, user_id)
+        if session is not None and session.answers and session.current_question >= len(session.questions):
+            # The user answered everything that was generated while waiting for more
+            await ask_question(update, context)
 
 async def ask_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
-    session = user_sessions[user_id]
+    session = await run_store(session_store.get, user_id)
     
     if session.current_question < len(session.questions):
         question = session.questions[session.current_question]
+        total = QUESTION_COUNT if session.questions_pending else len(session.questions)
         message = (
-            f"📝 Interview Question {session.current_question + 1} of {len(session.questions)}\n\n"
+            f"📝 Interview Question {session.current_question + 1} of {total}\n\n"
             f"{question}\n\n"
             "🎙️ You can:\n"
             "• Send a voice message (recommended for practice)\n"
@@ -288,61 +2077,159 @@ async def ask_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "\nTake your time to think and structure your response!"
         )
         await update.message.reply_text(message)
+    elif session.questions_pending:
+        await update.message.reply_text("⏳ Preparing your next question...")
     else:
-        await generate_report(update, context)
+        with span("report"):
+            await generate_report(update, context)
 
 async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
-    if user_id not in user_sessions or not user_sessions[user_id].questions:
-        await update.message.reply_text("Please send a job URL first!")
-        return
-    
-    session = user_sessions[user_id]
-    
-    voice_file = await update.message.voice.get_file()
-    with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as temp_audio:
-        await voice_file.download_to_drive(temp_audio.name)
-        audio_path = temp_audio.name
-    
-    await update.message.reply_text("🔄 Processing your answer...")
-    
-    try:
-        # Convert OGG to WAV
-        wav_path = audio_path.replace('.ogg', '.wav')
-        os.system(f"ffmpeg -i {audio_path} {wav_path}")
+    # One answer per user at a time, in arrival order: each one moves current_question on
+    async with session_store.lock(user_id):
+        session = await run_store(session_store.get, user_id)
+        if session is None or not session.questions:
+            await update.message.reply_text("Please send a job URL first!")
+            return
+        if session.current_question >= len(session.questions):
+            await update.message.reply_text("⏳ Your next question is still being prepared, hang on a moment...")
+            return
         
-        # Transcribe using Google Speech Recognition
-        with sr.AudioFile(wav_path) as source:
-            audio = recognizer.record(source)
-            transcript = recognizer.recognize_google(audio)
+        await update.message.reply_text("🔄 Processing your answer...")
         
-        session.answers.append({
-            "question": session.questions[session.current_question],
-            "answer": transcript
-        })
+        try:
+            with span("voice_download"):
+                voice_file = await update.message.voice.get_file()
+                voice_bytes = bytes(await voice_file.download_as_bytearray())
+            transcript = await run_blocking("audio", transcribe_voice, voice_bytes)
         
-        feedback = generate_feedback(
-            session.questions[session.current_question],
-            transcript,
-            session.job_data
-        )
+            record = {
+                "question": session.questions[session.current_question],
+                "answer": transcript,
+                "feedback": None
+            }
+            session.answers.append(record)
         
-        await send_long_message(update.message, f"📝 Feedback:\n\n{feedback}")
+            record["feedback"] = await reply_with_feedback(
+                update.message,
+                record["question"],
+                transcript,
+                session.job_data,
+                user_id
+            )
+            await refresh_questions(user_id, session)
+            await add_report_block(user_id, session, record)
         
-        session.current_question += 1
-        await ask_question(update, context)
+            session.current_question += 1
+            await run_store(session_store.save, user_id, session)
+            await ask_question(update, context)
         
-    except Exception as e:
-        await update.message.reply_text(f"❌ Error processing answer: {str(e)}")
-    finally:
-        os.unlink(audio_path)
-        if os.path.exists(wav_path):
-            os.unlink(wav_path)
+        except Exception as e:
+            await update.message.reply_text(f"❌ Error processing answer: {str(e)}")
 
-def generate_feedback(question, answer, job_data):
-    prompt = f"""
+async def refresh_questions(user_id, session):
+    # Questions may have streamed in while an answer handler awaited feedback; with the SQLite store
+    # its copy of the session is stale, and saving it as is would drop them
+    latest = await run_store(session_store.get, user_id)
+    if latest is not None:
+        session.questions = latest.questions
+        session.questions_pending = latest.questions_pending
+
+def transcribe_voice(voice_bytes):
+    import speech_recognition as sr
+    
+    pcm = decode_voice_to_pcm(voice_bytes)
+    audio = sr.AudioData(pcm, AUDIO_SAMPLE_RATE, 2)
+    return transcribe_audio(audio)
+
+def decode_voice_to_pcm(voice_bytes):
+    # Telegram voice notes are OGG/Opus; decode them to mono 16-bit PCM entirely in memory
+    with span("audio_decode"):
+        if AUDIO_DECODER == "pyav" or (AUDIO_DECODER == "auto" and pyav_available()):
+            return decode_with_pyav(voice_bytes)
+        return decode_with_ffmpeg(voice_bytes)
+
+def decode_with_pyav(voice_bytes):
+    import av
+    
+    chunks = []
+    with av.open(io.BytesIO(voice_bytes)) as container:
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=AUDIO_SAMPLE_RATE)
+        for frame in container.decode(audio=0):
+            for resampled in resampler.resample(frame):
+                chunks.append(bytes(resampled.planes[0])[:resampled.samples * 2])
+        for resampled in resampler.resample(None):
+            chunks.append(bytes(resampled.planes[0])[:resampled.samples * 2])
+    return b''.join(chunks)
+
+def decode_with_ffmpeg(voice_bytes):
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), "pipe:1"],
+        input=voice_bytes,
+        capture_output=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"Could not decode voice message: {result.stderr.decode(errors='ignore').strip()}")
+    return result.stdout
+
+def transcribe_audio(audio):
+    with span("transcribe"):
+        if TRANSCRIPTION_BACKEND == "sphinx":
+            return get_recognizer().recognize_sphinx(audio)
+        if TRANSCRIPTION_BACKEND == "whisper":
+            return get_recognizer().recognize_whisper(audio, model=WHISPER_MODEL, language="english")
+        
+        # Transcribe using Google Speech Recognition
+        return get_recognizer().recognize_google(audio)
+
+async def reply_with_feedback(message, question, answer, job_data, user_id=None):
+    if LLM_STREAMING and not FEEDBACK_BATCHING:
+        return await stream_feedback(message, question, answer, job_data, user_id)
+    feedback = await generate_feedback(question, answer, job_data, user_id)
+    await send_long_message(message, f"📝 Feedback:\n\n{feedback}")
+    return feedback
+
+async def stream_feedback(reply_to, question, answer, job_data, user_id=None):
+    prompt = build_feedback_prompt(question, answer, job_data['title'], await lookup_rubric(job_data['title'], question))
+    reply = StreamingMessage(reply_to, lambda text: format_feedback_message(f"📝 Feedback:\n\n{clean_feedback(text)}"))
+    text = ''
+    async for chunk in stream_model_text(prompt, "feedback", user_id, PRIORITY_FEEDBACK):
+        text += chunk
+        await reply.update(text)
+    await reply.update(text, final=True)
+    return clean_feedback(text)
+
+async def generate_feedback(question, answer, job_data, user_id=None, priority=PRIORITY_FEEDBACK):
+    started = time.monotonic()
+    with span("feedback"):
+        if FEEDBACK_BATCHING:
+            feedback = await feedback_batcher.submit(question, answer, job_data['title'], user_id, priority)
+        else:
+            feedback = await request_feedback(question, answer, job_data['title'], user_id, priority)
+    elapsed = time.monotonic() - started
+    record_llm_latency("feedback", elapsed, elapsed)
+    return feedback
+
+async def request_feedback(question, answer, job_title, user_id=None, priority=PRIORITY_FEEDBACK, bill_to=None):
+    prompt = build_feedback_prompt(question, answer, job_title, await lookup_rubric(job_title, question))
+    response = await call_model(prompt, "feedback", user_id, priority, bill_to)
+    return clean_feedback(response.text)
+
+def build_feedback_prompt(question, answer, job_title, rubric=None):
+    answer = fit_to_budget(answer, PROMPT_TOKEN_BUDGETS["feedback"])
+    if rubric:
+        # The rubric already says what this role needs from the answer, so the prompt can be short
+        return f"""
+    Question: {question}
+    A strong answer covers: {rubric}
+    Answer: {answer}
+    
+    Against that, reply in 2 lines: "Strength: <one point>" then "Improve: <one suggestion>".
+    """
+    return f"""
     Analyze this interview response briefly:
-    Position: {job_data['title']}
+    Position: {job_title}
     Question: {question}
     Answer: {answer}
     
@@ -352,140 +2239,380 @@ def generate_feedback(question, answer, job_data):
     
     Be direct and constructive.
     """
+
+def rubric_key(job_title, question):
+    return hashlib.sha256(f"{job_title}\n{question}".encode('utf-8')).hexdigest()
+
+async def lookup_rubric(job_title, question):
+    if not PRECOMPUTE_RUBRICS:
+        return None
+    return await run_store(rubric_cache.get, rubric_key(job_title, question))
+
+async def schedule_rubrics(job_data, questions, user_id=None):
+    # Runs in the background; answers that arrive first just get the full feedback prompt
+    if not PRECOMPUTE_RUBRICS or not questions:
+        return
+    missing = [q for q in questions if await lookup_rubric(job_data['title'], q) is None]
+    key = rubric_key(job_data['title'], "\n".join(missing))
+    if not missing or key in pending_rubrics:
+        return
+    task = asyncio.create_task(prepare_rubrics(job_data['title'], missing, user_id))
+    pending_rubrics[key] = task
+    task.add_done_callback(lambda _: pending_rubrics.pop(key, None))
+
+async def prepare_rubrics(job_title, questions, user_id=None):
+    items = "\n".join(f"Item {index}: {question}" for index, question in enumerate(questions))
+    prompt = f"""
+    For each of these interview questions for a {job_title} role, say in one line of at most 25 words
+    what a strong answer covers.
     
-    response = gemini_model.generate_content(prompt)
-    feedback = response.text.strip()
+    {items}
     
+    Return only a JSON array with one object per item, in this shape:
+    [{{"item": 0, "rubric": "..."}}]
+    """
+    
+    rubrics = {}
+    try:
+        # Outside the user's rate budget, which is sized for questions plus feedback, but on their
+        # interview's bill: the call is made because of it
+        response = await call_model(prompt, "rubrics", priority=PRIORITY_REPORT, bill_to=[user_id])
+        text = response.text.strip()
+        entries = json.loads(text[text.find('['):text.rfind(']') + 1])
+        for entry in entries:
+            index = int(entry["item"])
+            if 0 <= index < len(questions) and entry.get("rubric"):
+                rubrics[questions[index]] = str(entry["rubric"]).strip()
+                await run_store(rubric_cache.set, rubric_key(job_title, questions[index]), rubrics[questions[index]])
+    except Exception:
+        pass  # Feedback falls back to the full prompt
+    return rubrics
+
+def clean_feedback(feedback):
     # Clean up the feedback format
-    feedback = (feedback
-               .replace('**', '')
-               .replace('*', '')
-               .replace('#', '')
-               .replace('Strength:', '✓ Strength:')
-               .replace('Improve:', '△ Improve:'))
+    return (feedback
+            .strip()
+            .replace('**', '')
+            .replace('*', '')
+            .replace('#', '')
+            .replace('Strength:', '✓ Strength:')
+            .replace('Improve:', '△ Improve:'))
+
+class FeedbackBatcher:
+    # Collects answers that arrive close together and reviews them in one structured prompt
+    def __init__(self, window=FEEDBACK_BATCH_WINDOW, max_size=FEEDBACK_BATCH_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._pending = []
+        self._timer = None
+        self.metrics = {"items": 0, "batches": 0, "fallback_calls": 0, "over_budget": 0}
+
+    async def submit(self, question, answer, job_title, user_id=None, priority=PRIORITY_FEEDBACK):
+        # Batches go out without a user, so each item pays its user's token here; a user who is out
+        # of tokens waits in the scheduler on their own instead of holding up a batch
+        if not llm_scheduler.try_charge(user_id):
+            self.metrics["over_budget"] += 1
+            return await request_feedback(question, answer, job_title, user_id, priority)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((question, answer, job_title, user_id, priority, future))
+        self.metrics["items"] += 1
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._review(batch))
+
+    async def _review(self, batch):
+        results = {}
+        if len(batch) > 1:
+            try:
+                results = await self._request_batch(batch)
+            except Exception:
+                results = {}
+        
+        async def fallback(question, answer, job_title, user_id, priority, future):
+            # The user's token was taken in submit(), so the call goes out without a user and
+            # only the ledger is billed to them
+            try:
+                feedback = await request_feedback(question, answer, job_title, None, priority, [user_id])
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(feedback)
+        
+        fallbacks = []
+        for index, (question, answer, job_title, user_id, priority, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in results:
+                future.set_result(results[index])
+                continue
+            # Single answers and anything the batch response didn't cover get their own call
+            if len(batch) > 1:
+                self.metrics["fallback_calls"] += 1
+            fallbacks.append(fallback(question, answer, job_title, user_id, priority, future))
+        # Concurrently, so a failed batch adds one call's latency instead of one per item
+        await asyncio.gather(*fallbacks)
+
+    async def _request_batch(self, batch):
+        items = "\n\n".join(
+            f"Item {index}\nPosition: {job_title}\nQuestion: {question}\nAnswer: {fit_to_budget(answer, PROMPT_TOKEN_BUDGETS['feedback'])}"
+            for index, (question, answer, job_title, *_) in enumerate(batch)
+        )
+        prompt = f"""
+    Analyze each of these interview responses briefly. They come from different candidates; judge each on its own.
     
-    return feedback
+    {items}
+    
+    For every item give one key strong point and one specific suggestion, direct and constructive.
+    Return only a JSON array with one object per item, in this shape:
+    [{{"item": 0, "strength": "...", "improve": "..."}}]
+    """
+        
+        self.metrics["batches"] += 1
+        priority = min(entry[4] for entry in batch)
+        response = await call_model(prompt, "feedback_batch", priority=priority, bill_to=[entry[3] for entry in batch])
+        
+        text = response.text.strip()
+        text = text[text.find('['):text.rfind(']') + 1]
+        results = {}
+        for entry in json.loads(text):
+            index = int(entry["item"])
+            if 0 <= index < len(batch) and entry.get("strength") and entry.get("improve"):
+                results[index] = clean_feedback(f"Strength: {entry['strength']}\nImprove: {entry['improve']}")
+        return results
+
+feedback_batcher = FeedbackBatcher()
 
 async def handle_text_answer(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.message.from_user.id
-    if user_id not in user_sessions or not user_sessions[user_id].questions:
-        await update.message.reply_text("Please send a job URL first!")
-        return
+    # One answer per user at a time, in arrival order: each one moves current_question on
+    async with session_store.lock(user_id):
+        session = await run_store(session_store.get, user_id)
+        if session is None or not session.questions:
+            await update.message.reply_text("Please send a job URL first!")
+            return
+        if session.current_question >= len(session.questions):
+            await update.message.reply_text("⏳ Your next question is still being prepared, hang on a moment...")
+            return
+        answer = update.message.text
+        
+        record = {
+            "question": session.questions[session.current_question],
+            "answer": answer,
+            "feedback": None
+        }
+        session.answers.append(record)
+        
+        record["feedback"] = await reply_with_feedback(
+            update.message,
+            record["question"],
+            answer,
+            session.job_data,
+            user_id
+        )
+        await refresh_questions(user_id, session)
+        await add_report_block(user_id, session, record)
+        
+        session.current_question += 1
+        await run_store(session_store.save, user_id, session)
+        await ask_question(update, context)
+
+async def generate_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.message.from_user.id
+    session = await run_store(session_store.get, user_id)
     
-    session = user_sessions[user_id]
-    answer = update.message.text
+    await update.message.reply_text("📊 Creating your interview performance report...")
     
-    session.answers.append({
-        "question": session.questions[session.current_question],
-        "answer": answer
-    })
+    # Feedback is normally stored as each answer arrives; only fill in what's missing
+    with span("report_feedback"):
+        await fill_missing_feedback(session, user_id)
     
-    feedback = generate_feedback(
-        session.questions[session.current_question],
-        answer,
-        session.job_data
-    )
+    with span("report_pdf"):
+        pdf_file = await take_report_pdf(user_id, session)
     
-    await send_long_message(update.message, f"📝 Feedback:\n\n{feedback}")
+    try:
+        # python-telegram-bot reads the whole file anyway, and can't name a spool that is still in memory
+        await update.message.reply_document(
+            document=pdf_file.read(),
+            caption="✨ Here's your detailed interview performance report!",
+            filename=f"Interview_Report_{session.job_data['title']}.pdf"
+        )
+    finally:
+        pdf_file.close()
     
-    session.current_question += 1
-    await ask_question(update, context)
+    await run_store(session_store.delete, user_id)
+    token_ledger.finish_interview(user_id)
 
-async def generate_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.message.from_user.id
-    session = user_sessions[user_id]
+async def fill_missing_feedback(session, user_id=None):
+    semaphore = asyncio.Semaphore(REPORT_FEEDBACK_CONCURRENCY)
     
-    await update.message.reply_text("📊 Creating your interview performance report...")
+    async def fill(qa):
+        async with semaphore:
+            qa['feedback'] = await generate_feedback(
+                qa['question'], qa['answer'], session.job_data, user_id, priority=PRIORITY_REPORT
+            )
     
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.units import inch
+    await asyncio.gather(*(fill(qa) for qa in session.answers if not qa.get('feedback')))
+
+# Report blocks rendered so far, per user, so the final report only has to lay out the PDF.
+# Drafts are local to this process; a report is rebuilt from the session if the draft is missing.
+report_drafts = OrderedDict()
+report_styles = None
+
+def get_report_styles():
+    global report_styles
+    if report_styles is None:
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+        
+        styles = getSampleStyleSheet()
+        report_styles = {
+            "normal": styles['Normal'],
+            "title": ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=24,
+                spaceAfter=30
+            ),
+            "heading": ParagraphStyle(
+                'CustomHeading',
+                parent=styles['Heading2'],
+                fontSize=14,
+                spaceAfter=12
+            ),
+            "subheading": ParagraphStyle(
+                'CustomSubHeading',
+                parent=styles['Heading3'],
+                fontSize=12,
+                spaceAfter=8
+            ),
+            "table": TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('TOPPADDING', (0, 0), (-1, 0), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('BOX', (0,0), (-1,-1), 2, colors.black),
+                ('VALIGN',(0,0),(-1,-1),'TOP'),
+            ]),
+        }
+    return report_styles
+
+class ReportDraft:
+    def __init__(self):
+        self.blocks = []  # (question, answer, feedback, flowables) per answer, in order
+        self.final = None  # (answers snapshot, task) for a report started right after the last answer
+
+def build_report_block(number, qa):
+    from reportlab.platypus import Paragraph, Spacer, Table
     
-    pdf_path = f"report_{user_id}.pdf"
-    doc = SimpleDocTemplate(pdf_path, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    styles = get_report_styles()
+    flowables = []
     
-    # Create the story (content) for the PDF
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30
-    )
+    # Question section
+    flowables.append(Paragraph(f"Question {number}:", styles["subheading"]))
+    flowables.append(Paragraph(escape(qa['question']), styles["normal"]))
+    flowables.append(Spacer(1, 8))
     
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12
-    )
+    # Create a table for answer and feedback
+    data = [
+        ['Your Response:', 'Feedback:'],
+        [Paragraph(escape(qa['answer']), styles["normal"]), Paragraph(escape(qa['feedback']), styles["normal"])]
+    ]
     
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=12,
-        spaceAfter=8
-    )
+    t = Table(data, colWidths=[REPORT_CONTENT_WIDTH/2.0-6]*2)
+    t.setStyle(styles["table"])
+    
+    flowables.append(t)
+    flowables.append(Spacer(1, 20))
+    return flowables
+
+async def add_report_block(user_id, session, qa):
+    draft = report_drafts.pop(user_id, None) or ReportDraft()
+    report_drafts[user_id] = draft  # Most recently used last
+    while len(report_drafts) > REPORT_MAX_DRAFTS:
+        report_drafts.popitem(last=False)
+    
+    number = len(draft.blocks) + 1
+    flowables = await run_blocking("pdf", build_report_block, number, qa)
+    draft.blocks.append((qa['question'], qa['answer'], qa['feedback'], flowables))
+    
+    # After the last answer, lay out the PDF while the feedback message is still being sent
+    if len(session.answers) >= len(session.questions) and not session.questions_pending:
+        snapshot = [dict(answer) for answer in session.answers]
+        draft.final = (snapshot, asyncio.create_task(
+            run_blocking("pdf", build_report_pdf, session.job_data, snapshot, draft)
+        ))
+
+async def take_report_pdf(user_id, session):
+    draft = report_drafts.pop(user_id, None)
+    if draft and draft.final:
+        snapshot, task = draft.final
+        try:
+            pdf_file = await task
+        except Exception:
+            pdf_file = None
+        if pdf_file is not None and snapshot == session.answers:
+            return pdf_file
+        if pdf_file is not None:
+            pdf_file.close()
+    return await run_blocking("pdf", build_report_pdf, session.job_data, session.answers, draft)
+
+def build_report_pdf(job_data, answers, draft=None):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    
+    styles = get_report_styles()
+    blocks = draft.blocks if draft else []
+    
+    # Render into memory; only very large reports spill over to a temporary file
+    pdf_file = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
+    doc = SimpleDocTemplate(pdf_file, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+    
+    # Create the story (content) for the PDF
+    story = []
     
     # Add title
-    story.append(Paragraph("Interview Performance Report", title_style))
+    story.append(Paragraph("Interview Performance Report", styles["title"]))
     
     # Add job details
-    story.append(Paragraph(f"Position: {session.job_data['title']}", heading_style))
+    story.append(Paragraph(f"Position: {escape(job_data['title'])}", styles["heading"]))
     story.append(Spacer(1, 12))
     
     # Add performance summary
-    story.append(Paragraph("Performance Analysis", heading_style))
+    story.append(Paragraph("Performance Analysis", styles["heading"]))
     story.append(Spacer(1, 12))
     
-    # Process each Q&A
-    for i, qa in enumerate(session.answers, 1):
-        # Question section
-        story.append(Paragraph(f"Question {i}:", subheading_style))
-        story.append(Paragraph(qa['question'], styles['Normal']))
-        story.append(Spacer(1, 8))
-        
-        # Create a table for answer and feedback
-        feedback = generate_feedback(qa['question'], qa['answer'], session.job_data)
-        data = [
-            ['Your Response:', 'Feedback:'],
-            [Paragraph(qa['answer'], styles['Normal']), Paragraph(feedback, styles['Normal'])]
-        ]
-        
-        t = Table(data, colWidths=[doc.width/2.0-6]*2)
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('BOX', (0,0), (-1,-1), 2, colors.black),
-            ('VALIGN',(0,0),(-1,-1),'TOP'),
-        ]))
-        
-        story.append(t)
-        story.append(Spacer(1, 20))
+    # Process each Q&A, reusing the blocks rendered while the interview was running
+    for i, qa in enumerate(answers, 1):
+        if i <= len(blocks) and blocks[i - 1][:3] == (qa['question'], qa['answer'], qa['feedback']):
+            story.extend(blocks[i - 1][3])
+        else:
+            story.extend(build_report_block(i, qa))
     
     # Build the PDF
     doc.build(story)
-    
-    await update.message.reply_document(
-        document=open(pdf_path, 'rb'),
-        caption="✨ Here's your detailed interview performance report!",
-        filename=f"Interview_Report_{session.job_data['title']}.pdf"
-    )
-    
-    os.unlink(pdf_path)
-    del user_sessions[user_id]
+    pdf_file.seek(0)
+    return pdf_file
 
 async def send_long_message(message, text):
+    await message.reply_text(format_feedback_message(text))
+
+def format_feedback_message(text):
     # Clean up formatting and make feedback more readable
     text = (text
            .replace('**', '')
@@ -502,17 +2629,269 @@ async def send_long_message(message, text):
 
 {text}"""
     
-    await message.reply_text(formatted_text)
+    return formatted_text
 
-def main():
-    print("Starting bot...")
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+async def ingest_urls(urls, bank, concurrency=INGEST_CONCURRENCY, variants=1):
+    # Fetch, parse and generate questions for many postings; finished ones are committed one by one,
+    # so an interrupted run picks up where it stopped
+    done = bank.ingested_urls()
+    todo = {}
+    for url in urls:
+        key = normalize_job_url(url)
+        if key not in done:
+            todo.setdefault(key, url)
+    print(f"{len(urls)} URLs: {len(urls) - len(todo)} already in the bank or repeated, {len(todo)} to ingest")
+    
+    queue = asyncio.Queue()
+    for url in todo.values():
+        queue.put_nowait(url)
+    progress = {"ok": 0, "failed": 0}
+    started = time.monotonic()
+    
+    def report(final=False):
+        elapsed = time.monotonic() - started
+        finished = progress["ok"] + progress["failed"]
+        rate = finished / elapsed * 60 if elapsed else 0.0
+        eta = (len(todo) - finished) / rate * 60 if rate else 0.0
+        print(f"{'Done' if final else 'Progress'}: {finished}/{len(todo)} ({progress['ok']} ok, {progress['failed']} failed), "
+              f"{rate:.1f} postings/min" + ("" if final else f", about {eta:.0f}s left"))
+    
+    async def worker():
+        while not queue.empty():
+            url = queue.get_nowait()
+            try:
+                job_data = await fetch_job_details(url)
+                context = build_question_context(job_data)
+                question_sets = []
+                for _ in range(variants):
+                    questions = await request_questions(context)
+                    if questions:
+                        question_sets.append(questions)
+                if not question_sets:
+                    raise Exception("Gemini returned no questions")
+                all_questions = list(dict.fromkeys(q for questions in question_sets for q in questions))
+                rubrics = await prepare_rubrics(job_data['title'], all_questions)
+                bank.put(url, job_data, question_sets, rubrics)
+                progress["ok"] += 1
+            except Exception as e:
+                bank.record_failure(url, e)
+                progress["failed"] += 1
+                print(f"Failed {url}: {e}")
+    
+    async def reporter():
+        while True:
+            await asyncio.sleep(INGEST_PROGRESS_INTERVAL)
+            report()
+    
+    reporter_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(todo)))))
+    finally:
+        reporter_task.cancel()
+        await shutdown_services()
+    report(final=True)
+    return progress
+
+def run_ingest(argv):
+    parser = argparse.ArgumentParser(prog="bot.py ingest", description="Preload job postings and their interview questions")
+    parser.add_argument("urls_file", help="Text file with one job URL per line")
+    parser.add_argument("--bank", default=QUESTION_BANK_PATH, help="Question bank database to fill")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    parser.add_argument("--variants", type=int, default=1, help="Question sets generated per posting")
+    args = parser.parse_args(argv)
+    
+    with open(args.urls_file, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    bank = QuestionBank(args.bank)
+    try:
+        asyncio.run(ingest_urls(urls, bank, args.concurrency, args.variants))
+        print("Bank:", bank.stats())
+        print("Gemini usage:", token_ledger.stats())
+    finally:
+        bank.close()
+        shutdown_executors()
+        chrome_pool.shutdown()
+
+def build_application(builder=None):
+    builder = builder or Application.builder().token(TELEGRAM_TOKEN)
+    app = (
+        builder
+        .concurrent_updates(MAX_CONCURRENT_UPDATES)
+        .post_init(start_prewarm)
+        .post_shutdown(shutdown_services)
+        .build()
+    )
     
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_handler(MessageHandler(filters.VOICE, handle_voice))
+    return app
+
+class WebhookServer:
+    def __init__(self, application, update_log):
+        self.application = application
+        self.update_log = update_log
+        self.draining = False
+        self.metrics = {"received": 0, "duplicates": 0, "rejected": 0}
     
-    app.run_polling()
+    def make_app(self):
+        from aiohttp import web
+        
+        web_app = web.Application()
+        web_app.router.add_post(WEBHOOK_PATH, self.handle_update)
+        web_app.router.add_get("/healthz", self.handle_health)
+        return web_app
+    
+    async def handle_update(self, request):
+        from aiohttp import web
+        
+        if WEBHOOK_SECRET_TOKEN and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET_TOKEN:
+            self.metrics["rejected"] += 1
+            return web.Response(status=403)
+        if self.draining:
+            # Telegram redelivers failed updates, and the retry lands on a worker that is still up
+            return web.Response(status=503)
+        try:
+            data = await request.json()
+            update_id = int(data["update_id"])
+        except (ValueError, KeyError, TypeError):
+            self.metrics["rejected"] += 1
+            return web.Response(status=400)
+        
+        if not await run_store(self.update_log.claim, update_id):
+            self.metrics["duplicates"] += 1
+            return web.Response()
+        self.metrics["received"] += 1
+        # Acknowledge straight away; the update is handled in the background like in polling mode
+        await self.application.update_queue.put(Update.de_json(data, self.application.bot))
+        return web.Response()
+    
+    async def handle_health(self, request):
+        from aiohttp import web
+        
+        if self.draining:
+            return web.Response(status=503, text="draining")
+        return web.Response(text="ok")
+    
+    def in_flight(self):
+        return self.application.update_queue.qsize() + self.application.update_processor.current_concurrent_updates
+    
+    async def drain(self, timeout=SHUTDOWN_DRAIN_TIMEOUT):
+        # Let queued and running updates finish so interviews in progress aren't cut off
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        idle_checks = 0
+        while time.monotonic() < deadline:
+            # An update moves from the queue to a handler between two checks, so require two idle ones
+            idle_checks = idle_checks + 1 if self.in_flight() == 0 else 0
+            if idle_checks >= 2:
+                return True
+            await asyncio.sleep(0.1)
+        return False
+
+async def serve_webhook(application, update_log=None, stop=None, port=WEBHOOK_PORT, reuse_port=False, worker_id=0):
+    from aiohttp import web
+    
+    server = WebhookServer(application, update_log if update_log is not None else make_update_log())
+    if stop is None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+    
+    await application.initialize()
+    await application.start()
+    await start_prewarm(application)
+    runner = web.AppRunner(server.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_LISTEN, port, reuse_port=reuse_port)
+    await site.start()
+    print(f"Worker {worker_id} listening on {WEBHOOK_LISTEN}:{port}{WEBHOOK_PATH}")
+    
+    try:
+        await stop.wait()
+        # Close the listening socket first so new deliveries go to the other workers
+        await site.stop()
+        if not await server.drain():
+            print(f"Worker {worker_id}: {server.in_flight()} updates still running after {SHUTDOWN_DRAIN_TIMEOUT}s")
+    finally:
+        await runner.cleanup()
+        await application.stop()
+        await application.shutdown()
+        await shutdown_services(application)
+    return server
+
+def run_webhook_worker(worker_id=0):
+    global session_store
+    if WEBHOOK_WORKERS > 1:
+        # A user's next update can reach any worker, so sessions have to live in the shared database
+        if SESSION_STORE == "memory":
+            session_store = SQLiteSessionStore()
+        # Split the Gemini rate limit between the workers
+        llm_scheduler.global_bucket = TokenBucket(
+            LLM_GLOBAL_RATE / WEBHOOK_WORKERS,
+            max(1, LLM_GLOBAL_BURST // WEBHOOK_WORKERS)
+        )
+    
+    application = build_application(Application.builder().token(TELEGRAM_TOKEN).updater(None))
+    metrics_server = start_metrics_server(METRICS_PORT + worker_id if METRICS_PORT else None)
+    try:
+        asyncio.run(serve_webhook(application, reuse_port=WEBHOOK_WORKERS > 1, worker_id=worker_id))
+    finally:
+        stop_metrics_server(metrics_server)
+        shutdown_executors()
+        chrome_pool.shutdown()
+
+async def register_webhook():
+    async with Bot(TELEGRAM_TOKEN) as telegram_bot:
+        await telegram_bot.set_webhook(
+            WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET_TOKEN,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=Update.ALL_TYPES
+        )
+
+def run_webhook():
+    print(f"Starting bot with {WEBHOOK_WORKERS} webhook workers...")
+    asyncio.run(register_webhook())
+    if WEBHOOK_WORKERS == 1:
+        run_webhook_worker()
+        return
+    
+    # Spawned workers import the bot afresh instead of inheriting open sockets and databases
+    spawn = multiprocessing.get_context("spawn")
+    workers = [spawn.Process(target=run_webhook_worker, args=(n,)) for n in range(WEBHOOK_WORKERS)]
+    for worker in workers:
+        worker.start()
+    
+    def stop_workers(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+    
+    signal.signal(signal.SIGINT, stop_workers)
+    signal.signal(signal.SIGTERM, stop_workers)
+    for worker in workers:
+        worker.join()
+
+def main():
+    if sys.argv[1:2] == ["webhook"]:
+        run_webhook()
+        return
+    if sys.argv[1:2] == ["ingest"]:
+        run_ingest(sys.argv[2:])
+        return
+    
+    print("Starting bot...")
+    app = build_application()
+    metrics_server = start_metrics_server()
+    
+    try:
+        app.run_polling()
+    finally:
+        stop_metrics_server(metrics_server)
+        shutdown_executors()
+        chrome_pool.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+import bot
+
+def test_sqlite_reads_do_not_write(tmp_path):
+    backend = bot.SQLiteCacheBackend(str(tmp_path / "cache.db"), "jobs", 10)
+    backend.set("a", {"title": "A"}, 1e12)
+    changes = backend._db.total_changes
+    assert backend.get("a") == ({"title": "A"}, 1e12)
+    assert backend._db.total_changes == changes
+
+def test_sqlite_eviction_keeps_recently_read_entries(tmp_path):
+    backend = bot.SQLiteCacheBackend(str(tmp_path / "cache.db"), "jobs", 2)
+    backend.set("a", 1, 1e12)
+    backend.set("b", 2, 1e12)
+    backend.get("a")
+    assert backend.set("c", 3, 1e12) == 1
+    assert backend.get("a") is not None
+    assert backend.get("b") is None
+
+def test_sqlite_cache_runs_in_the_db_pool(tmp_path):
+    cache = bot.TTLCache(bot.SQLiteCacheBackend(str(tmp_path / "cache.db"), "jobs", 10), 60)
+    threads = []
+    get = cache.backend.get
+    cache.backend.get = lambda key: threads.append(threading.current_thread()) or get(key)
+
+    async def run():
+        await bot.run_store(cache.set, "a", 1)
+        return await bot.run_store(cache.get, "a")
+    try:
+        assert asyncio.run(run()) == 1
+    finally:
+        bot.shutdown_executors()
+    assert threads and threads[0] is not threading.main_thread()
+    assert not bot.TTLCache(bot.MemoryCacheBackend(10), 60).blocking
@@ -0,0 +1,75 @@
+import bot
+
+class FakeSwitch:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        assert handle in self.driver.window_handles
+        self.driver.current_window_handle = handle
+
+class FakeDriver:
+    # Just enough of a Chrome WebDriver for the pool's browser context handling
+    def __init__(self, fail_dispose=False):
+        self.fail_dispose = fail_dispose
+        self.window_handles = ["base"]
+        self.current_window_handle = "base"
+        self.switch_to = FakeSwitch(self)
+        self.contexts = {}  # context id -> target ids
+        self.disposed = []
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Target.createBrowserContext":
+            context_id = f"context{len(self.contexts) + 1}"
+            self.contexts[context_id] = []
+            return {"browserContextId": context_id}
+        if command == "Target.createTarget":
+            target_id = f"target{sum(map(len, self.contexts.values())) + 1}"
+            self.contexts[params["browserContextId"]].append(target_id)
+            self.window_handles.append(target_id)
+            return {"targetId": target_id}
+        if command == "Target.disposeBrowserContext":
+            if self.fail_dispose:
+                raise Exception("disposeBrowserContext failed")
+            for target_id in self.contexts[params["browserContextId"]]:
+                self.window_handles.remove(target_id)
+            self.disposed.append(params["browserContextId"])
+            return {}
+        raise AssertionError(f"unexpected command {command}")
+
+    def quit(self):
+        self.quit_called = True
+
+def test_each_lease_browses_in_its_own_context():
+    drivers = []
+    pool = bot.ChromeDriverPool(max_size=1, driver_factory=lambda: drivers.append(FakeDriver()) or drivers[-1])
+    for _ in range(2):
+        with pool.lease() as driver:
+            assert driver.current_window_handle != "base"
+            visited = driver.current_window_handle
+        assert driver.current_window_handle == "base"
+        assert visited not in driver.window_handles
+    assert len(drivers) == 1
+    assert drivers[0].disposed == ["context1", "context2"]
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["reset_failures"] == stats["recycled"] == stats["crashed"] == 0
+
+def test_failed_reset_is_logged_and_counted_apart_from_page_limit(capsys):
+    pool = bot.ChromeDriverPool(max_size=1, max_pages=2, driver_factory=lambda: FakeDriver(fail_dispose=True))
+    with pool.lease() as driver:
+        pass
+    assert driver.quit_called
+    assert "Could not reset a browser" in capsys.readouterr().out
+    stats = pool.stats()
+    assert stats["reset_failures"] == 1
+    assert stats["recycled"] == 0
+
+def test_page_limit_recycles_without_reset():
+    pool = bot.ChromeDriverPool(max_size=1, max_pages=1, driver_factory=FakeDriver)
+    with pool.lease() as driver:
+        pass
+    assert driver.quit_called
+    assert driver.disposed == []
+    assert pool.stats()["recycled"] == 1
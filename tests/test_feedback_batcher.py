@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+import bot
+from fake_model import FakeModel
+
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch):
+    monkeypatch.setattr(bot, "llm_scheduler", bot.LLMScheduler())
+    monkeypatch.setattr(bot, "token_ledger", bot.TokenLedger())
+    monkeypatch.setattr(bot, "gemini_model", FakeModel(latency=0.01, jitter=0))
+    monkeypatch.setattr(bot, "PRECOMPUTE_RUBRICS", False)
+
+def test_batched_answer_takes_one_user_token():
+    batcher = bot.FeedbackBatcher(window=0.01)
+
+    async def run():
+        try:
+            return await batcher.submit("1. Tell me about yourself.", "I build things.", "Engineer", user_id=7)
+        finally:
+            await bot.llm_scheduler.close()
+    assert asyncio.run(run())
+    # A lone answer falls back to a single call, which must not take a second token
+    bucket = bot.llm_scheduler._user_buckets[7]
+    assert bot.LLM_USER_BURST - 1 <= bucket.tokens < bot.LLM_USER_BURST - 0.5
+    assert bot.token_ledger.interviews[7][0] == 1
@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+import bot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "jobs")
+JS_SHELL = "<html><head><title>Data Analyst | Example</title></head><body><div id='root'></div><footer>© Example Inc. All rights reserved.</footer></body></html>"
+BROWSER_JOB = {"title": "Data Analyst", "requirements": ["SQL"], "responsibilities": [], "description": "", "experience_level": "", "fallbacks": []}
+
+def fixture_html(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(bot, "fetch_strategies", bot.TTLCache(bot.MemoryCacheBackend(100), 60))
+    monkeypatch.setattr(bot, "scrape_job_details", lambda url: dict(BROWSER_JOB))
+
+def fetch(handler, url="https://jobs.example.com/1"):
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        bot.http_client = client
+        try:
+            return await bot.fetch_job_details(url)
+        finally:
+            await bot.close_http_client()
+    return asyncio.run(run())
+
+def test_server_rendered_page_is_learned_as_http():
+    job_data = fetch(lambda request: httpx.Response(200, text=fixture_html("generic_nurse_server_rendered.html")))
+    assert job_data["title"] == "Registered Nurse (Night Shift)"
+    assert bot.fetch_strategies.get("jobs.example.com") == "http"
+
+def test_javascript_shell_is_learned_as_browser():
+    assert fetch(lambda request: httpx.Response(200, text=JS_SHELL)) == BROWSER_JOB
+    assert bot.fetch_strategies.get("jobs.example.com") == "browser"
+
+def time_out(request):
+    raise httpx.ReadTimeout("timed out", request=request)
+
+@pytest.mark.parametrize("handler", [
+    lambda request: httpx.Response(503),
+    lambda request: httpx.Response(429),
+    time_out,
+])
+def test_transient_http_failure_uses_the_browser_once(handler, capsys):
+    assert fetch(handler) == BROWSER_JOB
+    assert bot.fetch_strategies.get("jobs.example.com") is None
+    assert "HTTP fetch of https://jobs.example.com/1 failed" in capsys.readouterr().out
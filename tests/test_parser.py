@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+import bot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "jobs")
+
+def parse_fixture(name):
+    path = os.path.join(FIXTURES_DIR, name)
+    with open(path, encoding="utf-8") as f:
+        return bot.parse_job_page(f.read(), path)
+
+@pytest.mark.parametrize("name, title, requirements, responsibilities", [
+    ("generic_nurse_server_rendered.html", "Registered Nurse (Night Shift)", 2, 3),
+    ("greenhouse_backend_engineer.html", "Senior Backend Engineer", 4, 4),
+    ("lever_data_analyst.html", "Data Analyst", 3, 3),
+    ("linkedin_product_manager.html", "Product Manager, Payments", 3, 3),
+    ("workday_nested_designer.html", "UX Designer", 3, 3),
+])
+def test_fixture_postings(name, title, requirements, responsibilities):
+    job_data = parse_fixture(name)
+    assert job_data["title"] == title
+    assert len(job_data["requirements"]) == requirements
+    assert len(job_data["responsibilities"]) == responsibilities
+    assert job_data["fallbacks"] == []
+    bot.validate_job_details(job_data, strict=True)
+
+def test_javascript_shell_only_parses_through_fallbacks():
+    # What a plain fetch of a JavaScript-rendered board sees: the <title> and footer boilerplate
+    html = ("<html><head><title>Data Analyst | Example</title></head><body><div id='root'></div>"
+            "<footer><p>Example Inc. is an equal opportunity employer. We value diversity and do not "
+            "discriminate on any basis. © Example Inc. All rights reserved.</p></footer></body></html>")
+    job_data = bot.parse_job_page(html, "https://jobs.example.com/1")
+    assert job_data["fallbacks"] == ["title_tag", "text_blocks"]
+    bot.validate_job_details(job_data)
+    with pytest.raises(Exception, match="fallbacks"):
+        bot.validate_job_details(job_data, strict=True)
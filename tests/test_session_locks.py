@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+
+import pytest
+from telegram import Update
+from telegram.ext import Application
+
+import bot
+from fake_model import FakeModel
+from fake_telegram import FakeTelegramRequest, make_text_update
+
+QUESTIONS = ["1. q1", "2. q2", "3. q3"]
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        store = bot.InMemorySessionStore()
+    else:
+        store = bot.SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(bot, "session_store", store)
+    monkeypatch.setattr(bot, "llm_scheduler", bot.LLMScheduler())
+    monkeypatch.setattr(bot, "gemini_model", FakeModel(latency=0.1, jitter=0))
+    monkeypatch.setattr(bot, "PREWARM_ON_START", False)
+    monkeypatch.setattr(bot, "PRECOMPUTE_RUBRICS", False)
+    yield store
+    bot.shutdown_executors()
+
+def test_concurrent_answers_go_to_consecutive_questions(store):
+    request = FakeTelegramRequest(record=True)
+
+    async def run():
+        app = bot.build_application(Application.builder().token("1:X").updater(None).request(request))
+        await app.initialize()
+        session = bot.UserSession()
+        session.job_data = {"title": "T"}
+        session.questions = list(QUESTIONS)
+        await bot.run_store(store.save, 7, session)
+        try:
+            await asyncio.gather(*(
+                app.process_update(Update.de_json(make_text_update(n, 7, f"answer {n}"), app.bot))
+                for n in (1, 2)
+            ))
+            return await bot.run_store(store.get, 7)
+        finally:
+            await app.shutdown()
+            await bot.shutdown_services()
+    session = asyncio.run(run())
+    assert [answer["question"] for answer in session.answers] == ["1. q1", "2. q2"]
+    assert [answer["answer"] for answer in session.answers] == ["answer 1", "answer 2"]
+    assert session.current_question == 2
+    asked = [text.split("\n\n")[1] for text in request.sent[7] if "Interview Question" in text]
+    assert asked == ["2. q2", "3. q3"]
+
+def hold_lease(store, user_id, expires):
+    # A lease row as another worker would leave it
+    store._db.execute(
+        "INSERT INTO session_locks (user_id, owner, expires) VALUES (?, ?, ?)",
+        (user_id, os.getpid() + 1, expires)
+    )
+    store._db.commit()
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    # Only the SQLite store leases users across workers
+    yield bot.SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    bot.shutdown_executors()
+
+def test_expired_lease_is_taken_over(sqlite_store):
+    store = sqlite_store
+    hold_lease(store, 7, time.time() - 1)
+
+    async def run():
+        async with store.lock(7):
+            return store._db.execute("SELECT owner FROM session_locks WHERE user_id = 7").fetchone()[0]
+    assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == os.getpid()
+    assert store._db.execute("SELECT COUNT(*) FROM session_locks").fetchone()[0] == 0
+
+def test_live_lease_holds_off_other_workers(sqlite_store):
+    store = sqlite_store
+    hold_lease(store, 7, time.time() + bot.SESSION_LOCK_TTL)
+
+    async def run():
+        async with store.lock(7):
+            pass
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(run(), timeout=0.3))
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import bot
+from fake_model import FakeResponse
+
+class FlakyStreamModel:
+    # Streams the given chunks, then fails with a quota error on the first `failures` calls
+    def __init__(self, chunks, failures=1):
+        self.chunks = chunks
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        failing = self.calls <= self.failures
+
+        def stream_chunks():
+            for chunk in self.chunks if not failing else self.chunks[:1]:
+                yield FakeResponse(chunk)
+            if failing:
+                raise google_exceptions.ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        return stream_chunks()
+
+def collect(received):
+    # Drains a feedback stream into `received`, which keeps what arrived even if the stream fails
+    async def run():
+        try:
+            async for chunk in bot.stream_model_text("prompt", "feedback"):
+                received.append(chunk)
+        finally:
+            await bot.llm_scheduler.close()
+    asyncio.run(run())
+    return received
+
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch):
+    monkeypatch.setattr(bot, "llm_scheduler", bot.LLMScheduler(retry_base_delay=0.01))
+
+def test_stream_interrupted_after_output_is_not_retried(monkeypatch):
+    model = FlakyStreamModel(["Strength: good. ", "Improve: more numbers."], failures=3)
+    monkeypatch.setattr(bot, "gemini_model", model)
+    received = []
+    with pytest.raises(bot.ResponseInterrupted):
+        collect(received)
+    assert model.calls == 1
+    assert received == ["Strength: good. "]
+    assert bot.llm_scheduler.metrics["retries"] == 0
+
+def test_quota_error_before_output_is_retried(monkeypatch):
+    class QuotaThenStream(FlakyStreamModel):
+        def generate_content(self, prompt, stream=False, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise google_exceptions.ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+            return (FakeResponse(chunk) for chunk in self.chunks)
+
+    model = QuotaThenStream(["Strength: good. ", "Improve: more numbers."])
+    monkeypatch.setattr(bot, "gemini_model", model)
+    assert collect([]) == ["Strength: good. ", "Improve: more numbers."]
+    assert model.calls == 2